@@ -0,0 +1,114 @@
+# bench_faq_index.py
+#
+# Measures per-query latency of the precompiled FaqIndex against the original
+# per-keyword loop as the knowledge base grows from 10 to 100k keywords, and
+# checks that both produce the same contenders. Exits non-zero if they differ.
+#
+# Usage: python benchmarks/bench_faq_index.py
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from fuzzywuzzy import fuzz
+
+from faq_index import FaqIndex, MATCH_THRESHOLD, CLARIFICATION_THRESHOLD
+
+KEYWORD_COUNTS = [10, 100, 1_000, 10_000, 100_000]
+KEYWORDS_PER_FAQ = 5
+QUERIES = 50
+# The per-keyword loop is too slow to run at the largest sizes.
+LOOP_LIMIT = 10_000
+
+WORDS = (
+    "kente ankara batik fabric cloth design custom unique print wax cotton silk "
+    "hours open close time location address street accra osu contact phone email "
+    "delivery shipping send order price cost size yard colour pattern gift sale"
+).split()
+
+
+def make_faqs(keyword_count, rng):
+    """
+    Generates a synthetic knowledge base with the requested number of keywords.
+
+    Args:
+        keyword_count (int): Total number of keywords across all FAQs.
+        rng (random.Random): Random source, seeded for repeatable runs.
+
+    Returns:
+        list: FAQ dictionaries with 'keywords' and an 'answer'.
+    """
+    faqs = []
+    for faq_id in range(max(1, keyword_count // KEYWORDS_PER_FAQ)):
+        keywords = [
+            " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3))) + f" {faq_id}"
+            for _ in range(KEYWORDS_PER_FAQ)
+        ]
+        faqs.append({"keywords": keywords, "answer": f"Answer {faq_id}"})
+    return faqs
+
+
+def make_queries(rng):
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 6))) for _ in range(QUERIES)]
+
+
+def loop_top_contenders(user_question_processed, faqs):
+    """
+    The original get_bot_response loop, kept as a reference implementation. It scores
+    with fuzzywuzzy exactly as the bot did before the index existed.
+    """
+    best_match_score = 0
+    potential_matches = []
+    for faq_id, faq_entry in enumerate(faqs):
+        current_faq_max_score = 0
+        for keyword in faq_entry["keywords"]:
+            score = fuzz.partial_ratio(keyword, user_question_processed)
+            if score > best_match_score:
+                best_match_score = score
+            if score > current_faq_max_score:
+                current_faq_max_score = score
+        if current_faq_max_score >= MATCH_THRESHOLD:
+            potential_matches.append({"faq_id": faq_id, "faq_entry": faq_entry, "score": current_faq_max_score})
+    return [
+        match_info for match_info in potential_matches
+        if match_info["score"] >= (best_match_score - CLARIFICATION_THRESHOLD)
+    ]
+
+
+def time_per_query(func, queries):
+    start = time.perf_counter()
+    results = [func(query) for query in queries]
+    return (time.perf_counter() - start) / len(queries), results
+
+
+def main():
+    rng = random.Random(42)
+    queries = make_queries(rng)
+
+    mismatched = []
+    print(f"{'keywords':>10} {'loop ms/q':>12} {'index ms/q':>12} {'speedup':>9} {'parity':>7}")
+    for keyword_count in KEYWORD_COUNTS:
+        faqs = make_faqs(keyword_count, rng)
+        faq_index = FaqIndex(faqs)
+
+        index_time, index_results = time_per_query(faq_index.top_contenders, queries)
+
+        if keyword_count <= LOOP_LIMIT:
+            loop_time, loop_results = time_per_query(lambda q: loop_top_contenders(q, faqs), queries)
+            parity = "ok" if loop_results == index_results else "DIFF"
+            if parity != "ok":
+                mismatched.append(keyword_count)
+            print(f"{len(faq_index):>10} {loop_time * 1000:>12.3f} {index_time * 1000:>12.3f} "
+                  f"{loop_time / index_time:>8.1f}x {parity:>7}")
+        else:
+            print(f"{len(faq_index):>10} {'-':>12} {index_time * 1000:>12.3f} {'-':>9} {'-':>7}")
+
+    if mismatched:
+        sys.exit(f"FaqIndex contenders differ from the per-keyword loop at {mismatched} keywords")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# bench_inverted_index.py
+#
+# Checks that inverted-index candidate pre-filtering (FaqIndex(prefilter=True),
+# off by default) gives the same answers as the exhaustive keyword scan on large
+# synthetic knowledge bases, and reports recall, per-query latency and how many
+# keywords survive the filter at several corpus sizes. Exits non-zero if any
+# question gets different contenders from the two paths.
+#
+# Usage: python benchmarks/bench_inverted_index.py
+
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from faq_index import FaqIndex
+
+KEYWORD_COUNTS = [1_000, 10_000, 100_000]
+KEYWORDS_PER_FAQ = 5
+VOCABULARY_SIZE = 20_000
+QUERIES = 200
+
+
+def make_vocabulary(rng):
+    return [
+        "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9)))
+        for _ in range(VOCABULARY_SIZE)
+    ]
+
+
+def make_faqs(keyword_count, vocabulary, rng):
+    """
+    Generates a synthetic knowledge base with the requested number of keywords.
+
+    Args:
+        keyword_count (int): Total number of keywords across all FAQs.
+        vocabulary (list): Words keywords are built from.
+        rng (random.Random): Random source, seeded for repeatable runs.
+
+    Returns:
+        list: FAQ dictionaries with 'keywords' and an 'answer'.
+    """
+    faqs = []
+    for faq_id in range(keyword_count // KEYWORDS_PER_FAQ):
+        keywords = [
+            " ".join(rng.choice(vocabulary) for _ in range(rng.randint(1, 3)))
+            for _ in range(KEYWORDS_PER_FAQ)
+        ]
+        faqs.append({"keywords": keywords, "answer": f"Answer {faq_id}"})
+    return faqs
+
+
+def add_typo(word, rng):
+    position = rng.randrange(len(word))
+    return word[:position] + rng.choice(string.ascii_lowercase) + word[position + 1:]
+
+
+def make_queries(faq_index, vocabulary, rng):
+    """
+    Builds a mix of questions: keywords embedded in a sentence, keywords with a
+    typo, and random words that should mostly fall through to the fallback.
+    """
+    queries = []
+    for query_id in range(QUERIES):
+        filler = [rng.choice(vocabulary) for _ in range(rng.randint(1, 4))]
+        keyword = rng.choice(faq_index.keywords)
+        if query_id % 3 == 0:
+            queries.append(" ".join(["what", "about", keyword] + filler))
+        elif query_id % 3 == 1:
+            queries.append(" ".join(["do", "you", "have", add_typo(keyword, rng)]))
+        else:
+            queries.append(" ".join(filler))
+    return queries
+
+
+def time_per_query(func, queries):
+    start = time.perf_counter()
+    results = [func(query) for query in queries]
+    return (time.perf_counter() - start) / len(queries), results
+
+
+def main():
+    rng = random.Random(42)
+    vocabulary = make_vocabulary(rng)
+
+    mismatched = []
+    print(f"{'keywords':>10} {'scan ms/q':>11} {'index ms/q':>11} {'speedup':>9} "
+          f"{'avg cands':>10} {'recall':>8} {'parity':>8}")
+    for keyword_count in KEYWORD_COUNTS:
+        faq_index = FaqIndex(make_faqs(keyword_count, vocabulary, rng), prefilter=True)
+        queries = make_queries(faq_index, vocabulary, rng)
+
+        scan_time, scan_results = time_per_query(lambda q: faq_index.top_contenders(q, exhaustive=True), queries)
+        index_time, index_results = time_per_query(faq_index.top_contenders, queries)
+
+        candidate_counts = []
+        for query in queries:
+            candidates = faq_index.candidates(query)
+            candidate_counts.append(len(faq_index) if candidates is None else len(candidates))
+
+        # Recall: share of exhaustive-scan contenders the indexed path also found.
+        expected = sum(len(result) for result in scan_results)
+        found = sum(
+            len([match for match in index_result if match in scan_result])
+            for scan_result, index_result in zip(scan_results, index_results)
+        )
+        recall = found / expected if expected else 1.0
+        parity = sum(a == b for a, b in zip(scan_results, index_results)) / len(queries)
+        mismatched.extend(
+            (len(faq_index), query)
+            for query, scan_result, index_result in zip(queries, scan_results, index_results)
+            if scan_result != index_result
+        )
+
+        print(f"{len(faq_index):>10} {scan_time * 1000:>11.3f} {index_time * 1000:>11.3f} "
+              f"{scan_time / index_time:>8.1f}x {sum(candidate_counts) / len(queries):>10.0f} "
+              f"{recall:>8.2%} {parity:>8.2%}")
+
+    for keyword_count, query in mismatched[:10]:
+        print(f"MISMATCH at {keyword_count} keywords: {query!r}")
+    if mismatched:
+        sys.exit(f"{len(mismatched)} questions got different contenders from the inverted index")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# bench_normalizer.py
+#
+# Per-query cost of question normalization: the inline code run_chatbot used
+# to have (translation table rebuilt on every input) against Normalizer, for
+# unique questions and for repeated ones that hit the query cache.
+#
+# Usage: python benchmarks/bench_normalizer.py
+
+import os
+import random
+import string
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from normalizer import Normalizer
+
+QUESTIONS = 10_000
+REPEATS = 5
+
+WORDS = "What are your Hours? Do you sell Kente, Ankara & Batik?! Where's the shop... Café Délivery".split()
+
+
+def inline_normalize(user_input):
+    """The normalization run_chatbot used to do inline."""
+    processed_input = user_input.lower()
+    processed_input = processed_input.translate(str.maketrans('', '', string.punctuation))
+    return ' '.join(processed_input.split())
+
+
+def make_questions(rng):
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 10))) + f" {n}" for n in range(QUESTIONS)]
+
+
+def per_query_us(func, questions):
+    best = min(timeit.repeat(lambda: [func(question) for question in questions], number=1, repeat=REPEATS))
+    return best / len(questions) * 1_000_000
+
+
+def main():
+    rng = random.Random(42)
+    unique_questions = make_questions(rng)
+    repeated_questions = [rng.choice(unique_questions[:50]) for _ in range(QUESTIONS)]
+
+    plain = Normalizer()
+    folding = Normalizer(fold_unicode=True)
+    assert all(plain.normalize(question) == inline_normalize(question) for question in unique_questions)
+
+    rows = [
+        ("inline (old run_chatbot code)", per_query_us(inline_normalize, unique_questions)),
+        ("Normalizer.normalize", per_query_us(plain.normalize, unique_questions)),
+        ("Normalizer.normalize, fold_unicode", per_query_us(folding.normalize, unique_questions)),
+        ("Normalizer.normalize_query, repeated", per_query_us(plain.normalize_query, repeated_questions)),
+    ]
+    print(f"{'variant':<40} {'us/query':>9}")
+    for name, cost in rows:
+        print(f"{name:<40} {cost:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
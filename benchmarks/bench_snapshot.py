@@ -0,0 +1,93 @@
+# bench_snapshot.py
+#
+# Cold-start time and memory of a fresh process loading a large knowledge base
+# from faqs.json (parse, validate, normalize, build the index) versus
+# memory-mapping the compiled snapshot. RSS is split into anonymous memory,
+# private to each process, and file-backed memory, which processes mapping the
+# same snapshot share.
+#
+# Usage: python benchmarks/bench_snapshot.py
+
+import json
+import os
+import random
+import string
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from faq_store import compile_faq_snapshot
+
+FAQ_COUNTS = [1_000, 20_000]
+KEYWORDS_PER_FAQ = 5
+RUNS = 5
+
+# Runs in a fresh interpreter; prints load time and memory as JSON.
+CHILD = """
+import json, resource, sys, time
+sys.path.insert(0, {root!r})
+from faq_store import load_faq_index
+start = time.perf_counter()
+faq_index = load_faq_index({faqs!r}, {snapshot!r})
+faq_index.top_contenders("warm up the first query")
+elapsed = time.perf_counter() - start
+memory = {{}}
+try:
+    with open("/proc/self/status") as status:
+        for line in status:
+            name, _, value = line.partition(":")
+            if name in ("VmRSS", "RssAnon", "RssFile"):
+                memory[name] = int(value.split()[0])
+except OSError:
+    memory["VmRSS"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{"seconds": elapsed, "kind": type(faq_index.faqs).__name__, **memory}}))
+"""
+
+
+def make_faqs(faq_count, rng):
+    words = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9))) for _ in range(20_000)]
+    return [
+        {
+            "keywords": [" ".join(rng.choice(words) for _ in range(rng.randint(1, 3))) for _ in range(KEYWORDS_PER_FAQ)],
+            "answer": " ".join(rng.choice(words) for _ in range(30)),
+        }
+        for _ in range(faq_count)
+    ]
+
+
+def measure(faq_file_name, snapshot_file_name):
+    runs = []
+    for _ in range(RUNS):
+        output = subprocess.run(
+            [sys.executable, "-c", CHILD.format(root=ROOT, faqs=faq_file_name, snapshot=snapshot_file_name)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        runs.append(json.loads(output))
+    return min(runs, key=lambda run: run["seconds"])
+
+
+def main():
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as workdir:
+        print(f"{'keywords':>9} {'source':>9} {'load ms':>9} {'RSS MB':>8} {'anon MB':>8} {'file MB':>8}")
+        for faq_count in FAQ_COUNTS:
+            faq_file_name = os.path.join(workdir, f"faqs_{faq_count}.json")
+            snapshot_file_name = os.path.join(workdir, f"faqs_{faq_count}.snapshot")
+            with open(faq_file_name, "w", encoding="utf-8") as faq_file:
+                json.dump(make_faqs(faq_count, rng), faq_file)
+            compile_faq_snapshot(faq_file_name, snapshot_file_name)
+
+            for source, snapshot in (("json", None), ("snapshot", snapshot_file_name)):
+                run = measure(faq_file_name, snapshot)
+                expected = "SnapshotFaqs" if snapshot else "list"
+                assert run["kind"] == expected, f"expected {expected} load, got {run['kind']}"
+                print(f"{faq_count * KEYWORDS_PER_FAQ:>9} {source:>9} {run['seconds'] * 1000:>9.1f} "
+                      f"{run['VmRSS'] / 1024:>8.1f} {run.get('RssAnon', 0) / 1024:>8.1f} "
+                      f"{run.get('RssFile', 0) / 1024:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+# loadgen.py
+#
+# Load generator for server.py. Each simulated client keeps one HTTP/1.1
+# connection and one chat session open and asks questions back to back,
+# answering "Was this helpful?" whenever the bot asks. Every question is
+# distinct, so each /ask misses the response cache and is matched on the
+# worker pool. Reports /ask and /feedback latency separately, questions per
+# second and the response cache hit rate at each concurrency level.
+#
+# Usage:
+#   python benchmarks/loadgen.py                      # starts a throwaway server
+#   python benchmarks/loadgen.py --faq-count 20000    # ... over a synthetic knowledge base
+#   python benchmarks/loadgen.py --server 127.0.0.1:8080
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import string
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+KEYWORDS_PER_FAQ = 5
+TEMPLATES = ["what about {}", "do you have {}", "tell me about {}", "i need {} please"]
+
+
+def random_word(rng):
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9)))
+
+
+def make_faqs(faq_count, rng):
+    """
+    Generates a synthetic knowledge base, for measuring matching cost at scale.
+    """
+    words = [random_word(rng) for _ in range(20_000)]
+    return [
+        {
+            "keywords": [" ".join(rng.choice(words) for _ in range(rng.randint(1, 3))) for _ in range(KEYWORDS_PER_FAQ)],
+            "answer": f"Answer {faq_id}",
+        }
+        for faq_id in range(faq_count)
+    ]
+
+
+def make_questions(keywords, count, rng, seen):
+    """
+    Builds `count` questions that have not been asked before in this run.
+
+    Three in four mention an FAQ keyword, every other one of those with a typo;
+    the rest are random words that fall through to the fallback. A random word is
+    added to each so that no two questions normalize alike.
+
+    Args:
+        keywords (list): FAQ keywords the server knows.
+        count (int): Number of questions.
+        rng (random.Random): Random source, seeded for repeatable runs.
+        seen (set): Questions already asked; updated in place.
+    """
+    questions = []
+    while len(questions) < count:
+        if len(questions) % 4 == 3:
+            question = " ".join(random_word(rng) for _ in range(rng.randint(2, 5)))
+        else:
+            keyword = rng.choice(keywords).lower()
+            if len(questions) % 2:
+                position = rng.randrange(len(keyword))
+                keyword = keyword[:position] + rng.choice(string.ascii_lowercase) + keyword[position + 1:]
+            question = f"{rng.choice(TEMPLATES).format(keyword)} {random_word(rng)}"
+        if question not in seen:
+            seen.add(question)
+            questions.append(question)
+    return questions
+
+
+async def request(reader, writer, host, method, path, payload=None):
+    body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+    )
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    content_length = 0
+    for line in head.decode("latin-1").split("\r\n")[1:]:
+        if line.lower().startswith("content-length:"):
+            content_length = int(line.split(":", 1)[1])
+    return json.loads(await reader.readexactly(content_length))
+
+
+async def run_client(host, port, questions, ask_latencies, feedback_latencies):
+    reader, writer = await asyncio.open_connection(host, port)
+    session_id = None
+    try:
+        for question in questions:
+            start = time.perf_counter()
+            result = await request(reader, writer, host, "POST", "/ask", {"question": question, "session_id": session_id})
+            ask_latencies.append(time.perf_counter() - start)
+            session_id = result["session_id"]
+            if result["awaiting_feedback"]:
+                start = time.perf_counter()
+                await request(reader, writer, host, "POST", "/feedback", {"session_id": session_id, "feedback": "y"})
+                feedback_latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def cache_stats(host, port):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        return (await request(reader, writer, host, "GET", "/metrics"))["response_cache"]
+    finally:
+        writer.close()
+
+
+def percentiles(latencies):
+    if len(latencies) < 2:
+        return float("nan"), float("nan")
+    quantiles = statistics.quantiles(latencies, n=100)
+    return quantiles[49], quantiles[98]
+
+
+async def run_level(host, port, question_lists):
+    """
+    Runs one client per question list at the same time.
+
+    Returns:
+        dict: /ask and /feedback p50/p99 latency in seconds, questions per second,
+              and the share of questions answered from the response cache.
+    """
+    ask_latencies = []
+    feedback_latencies = []
+    before = await cache_stats(host, port)
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        run_client(host, port, questions, ask_latencies, feedback_latencies) for questions in question_lists
+    ))
+    elapsed = time.perf_counter() - start
+    after = await cache_stats(host, port)
+    hits = after["hits"] - before["hits"]
+    lookups = hits + after["misses"] - before["misses"]
+    return {
+        "ask": percentiles(ask_latencies),
+        "feedback": percentiles(feedback_latencies),
+        "asks_per_second": len(ask_latencies) / elapsed,
+        "cache_hit_rate": hits / lookups if lookups else 0.0,
+    }
+
+
+def start_server(faq_file_name, workdir):
+    """
+    Starts server.py on a free port in `workdir`, so the feedback and
+    unanswered-question logs it writes do not end up in the project.
+    """
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "server.py"), "--port", str(port), "--faqs", faq_file_name],
+        cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    # A large knowledge base takes a while to load, and every worker starts before the server listens.
+    for _ in range(600):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            return process, "127.0.0.1", port
+        except OSError:
+            if process.poll() is not None:
+                break
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("server.py did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure server.py latency and throughput.")
+    parser.add_argument("--server", help="host:port of a running server; one is started if omitted.")
+    parser.add_argument("--faqs", default=os.path.join(ROOT, "faqs.json"),
+                        help="FAQ file the server uses; questions are built from its keywords.")
+    parser.add_argument("--faq-count", type=int, default=0,
+                        help="Serve this many synthetic FAQs instead of --faqs (not with --server).")
+    parser.add_argument("--requests", type=int, default=200, help="Questions asked by each client.")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    workdir = tempfile.TemporaryDirectory(prefix="chatbox-loadgen-")
+    faq_file_name = args.faqs
+    if args.faq_count:
+        faq_file_name = os.path.join(workdir.name, "faqs.json")
+        with open(faq_file_name, "w", encoding="utf-8") as faq_file:
+            json.dump(make_faqs(args.faq_count, rng), faq_file)
+    with open(faq_file_name, "r", encoding="utf-8") as faq_file:
+        keywords = [keyword for faq_entry in json.load(faq_file) for keyword in faq_entry["keywords"]]
+
+    process = None
+    try:
+        if args.server:
+            host, port = args.server.rsplit(":", 1)
+            port = int(port)
+        else:
+            process, host, port = start_server(faq_file_name, workdir.name)
+
+        seen = set()
+        print(f"{'clients':>8} {'ask p50 ms':>11} {'ask p99 ms':>11} {'asks/s':>8} "
+              f"{'fb p50 ms':>10} {'fb p99 ms':>10} {'cache hits':>11}")
+        for clients in args.clients:
+            question_lists = [make_questions(keywords, args.requests, rng, seen) for _ in range(clients)]
+            result = asyncio.run(run_level(host, port, question_lists))
+            (ask_p50, ask_p99), (feedback_p50, feedback_p99) = result["ask"], result["feedback"]
+            print(f"{clients:>8} {ask_p50 * 1000:>11.2f} {ask_p99 * 1000:>11.2f} {result['asks_per_second']:>8.0f} "
+                  f"{feedback_p50 * 1000:>10.2f} {feedback_p99 * 1000:>10.2f} {result['cache_hit_rate']:>11.1%}")
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+        workdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,91 +1,131 @@
 # chatbot.py
 
-from fuzzywuzzy import fuzz
-import string
 import datetime
 import json
+import logging
+import os
+import time
+import uuid
+
+from faq_index import FaqIndex, MATCH_THRESHOLD
+from faq_snapshot import default_snapshot_path
+from faq_store import FaqStore
+from log_writer import JsonlLogWriter
+from metrics import metrics, unrecorded_metrics
+from normalizer import Normalizer, default_normalizer
+from response_cache import ResponseCache
+
+ANSWER = "answer"
+CLARIFY = "clarify"
+FALLBACK = "fallback"
+
+FALLBACK_RESPONSE = "I'm sorry, I don't understand your question. Could you please rephrase or ask about common topics like hours, designs, fabric types, location, or contact?"
+CLARIFICATION_PREFIX = "It sounds like you might be asking about"
+HUMAN_HELP_MESSAGE = "If you need further assistance, please feel free to email us at support@amasfabrics.com or call us at +233 55 123 4567 during business hours."
+GOODBYE_MESSAGE = "Thank you for visiting Amaze Africa Fabrics. Goodbye!"
+
+UNANSWERED_LOG_FILE = "unanswered_questions.jsonl"
+FEEDBACK_LOG_FILE = "feedback.jsonl"
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+logger = logging.getLogger("chatbox")
+
+unanswered_log = JsonlLogWriter(UNANSWERED_LOG_FILE)
+feedback_log = JsonlLogWriter(FEEDBACK_LOG_FILE)
+response_cache = ResponseCache()
 
 def log_unanswered_question(question):
     """
     Logs questions that the chatbot couldn't answer to a dedicated log file.
 
     This helps in identifying new FAQs that might need to be added to the knowledge base.
+    The record is queued for the background JSON Lines writer, so this never waits on disk.
 
     Args:
         question (str): The user's question that was not answered.
     """
-    log_file_name = "unanswered_questions.log"
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    with open(log_file_name, "a", encoding="utf-8") as log_file:
-        log_file.write(f"[{timestamp}] {question}\n")
-    print(f"DEBUG: Logged unanswered question: '{question}' to {log_file_name}")
+    started = time.perf_counter()
+    timestamp = datetime.datetime.now().strftime(TIMESTAMP_FORMAT)
+    unanswered_log.write({"timestamp": timestamp, "question": question})
+    metrics.record_stage("logging", time.perf_counter() - started)
+    logger.debug("Logged unanswered question: %r to %s", question, UNANSWERED_LOG_FILE)
 
 def log_feedback(user_question, bot_answer, feedback):
     """
     Logs user feedback (helpful/not helpful) on the bot's answers.
 
     This helps assess the quality of the bot's responses.
+    The record is queued for the background JSON Lines writer, so this never waits on disk.
 
     Args:
         user_question (str): The original question asked by the user.
         bot_answer (str): The answer provided by the chatbot.
         feedback (str): The user's feedback, typically 'y' for yes or 'n' for no.
     """
-    feedback_file_name = "feedback.log"
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    with open(feedback_file_name, "a", encoding="utf-8") as log_file:
-        log_file.write(f"[{timestamp}] Q: '{user_question}' | A: '{bot_answer}' | Helpful: {feedback}\n")
-    print(f"DEBUG: Logged feedback for '{user_question}' to {feedback_file_name}")
+    started = time.perf_counter()
+    timestamp = datetime.datetime.now().strftime(TIMESTAMP_FORMAT)
+    feedback_log.write({"timestamp": timestamp, "question": user_question, "answer": bot_answer, "helpful": feedback})
+    metrics.record_stage("logging", time.perf_counter() - started)
+    logger.debug("Logged feedback for %r to %s", user_question, FEEDBACK_LOG_FILE)
 
-def get_bot_response(user_question_processed, faqs):
+def get_bot_response(user_question_processed, faq_index):
     """
     Determines the best response for a user's question based on fuzzy matching with FAQs.
 
-    Applies fuzzy matching to compare the user's processed question against keywords
-    in the FAQ data. Handles direct matches, disambiguation for close matches,
+    Scores the user's processed question against every FAQ keyword through the
+    precompiled FaqIndex. Handles direct matches, disambiguation for close matches,
     and returns a default 'I don't understand' message if no suitable match is found.
 
     Args:
         user_question_processed (str): The user's question after preprocessing (lowercase, no punctuation).
-        faqs (list): A list of dictionaries, where each dictionary represents an FAQ
-                      with 'keywords' and an 'answer'.
+        faq_index (FaqIndex): The compiled FAQ index. A plain list of FAQ dictionaries
+                              with 'keywords' and an 'answer' is also accepted and
+                              compiled on the fly.
 
     Returns:
         str: The chatbot's response (an answer, a clarification question, or a default 'I don't understand' message).
     """
-    best_match_score = 0
-    potential_matches = [] 
+    if not isinstance(faq_index, FaqIndex):
+        faq_index = FaqIndex(faq_index)
 
-    MATCH_THRESHOLD = 80 
-    CLARIFICATION_THRESHOLD = 10 
-    
-    for faq_entry in faqs:
-        current_faq_max_score = 0 
+    top_contenders = match_question(user_question_processed, faq_index)
+    return build_response(top_contenders, user_question_processed)
 
-        for keyword in faq_entry["keywords"]:
-            score = fuzz.partial_ratio(keyword, user_question_processed)
+def match_question(user_question_processed, faq_index):
+    """
+    Finds the top FAQ contenders for a question, going through the response cache.
 
-            print(f"DEBUG: Comparing keyword '{keyword}' with user input '{user_question_processed}' -> Score: {score}")
-            print(f"DEBUG: Current best_match_score before potential update: {best_match_score}")
+    The matching result is cached rather than the reply text, so the reply is still
+    built (and an unanswered question still logged) on every call, cache hit or not.
 
-            if score > best_match_score:
-                best_match_score = score
+    Args:
+        user_question_processed (str): The user's question after preprocessing.
+        faq_index (FaqIndex): The compiled FAQ index.
 
-            if score > current_faq_max_score: 
-                current_faq_max_score = score
-        
-        if current_faq_max_score >= MATCH_THRESHOLD:
-            potential_matches.append({
-                "faq_entry": faq_entry,
-                "score": current_faq_max_score
-            })
+    Returns:
+        list: Dictionaries with 'faq_id', 'faq_entry' and 'score', as returned by FaqIndex.top_contenders.
+    """
+    top_contenders = response_cache.get(faq_index.version, user_question_processed)
+    if top_contenders is None:
+        top_contenders = faq_index.top_contenders(user_question_processed)
+        response_cache.put(faq_index.version, user_question_processed, top_contenders)
+    return top_contenders
 
-    print(f"DEBUG: Final best_match_score: {best_match_score} (Threshold: {MATCH_THRESHOLD})") 
+def build_response(top_contenders, user_question_processed):
+    """
+    Turns the matched FAQ contenders into the chatbot's reply.
 
-    top_contenders = [
-        match_info for match_info in potential_matches
-        if match_info["score"] >= (best_match_score - CLARIFICATION_THRESHOLD)
-    ]
+    Args:
+        top_contenders (list): Dictionaries with 'faq_id', 'faq_entry' and 'score', as returned by
+                               FaqIndex.top_contenders.
+        user_question_processed (str): The user's question after preprocessing, logged when unanswered.
+
+    Returns:
+        str: An answer, a clarification question, or the default 'I don't understand' message.
+    """
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Top contenders: %s (Threshold: %s)",
+                     [match_info['score'] for match_info in top_contenders], MATCH_THRESHOLD)
 
     if len(top_contenders) == 1:
         return top_contenders[0]["faq_entry"]["answer"]
@@ -93,69 +133,228 @@ def get_bot_response(user_question_processed, faqs):
         options = [entry["faq_entry"]["keywords"][0].replace("types of ", "").title() for entry in top_contenders] 
         
         if len(options) == 2:
-            clarification_question = f"It sounds like you might be asking about {options[0]} or {options[1]}? Could you please clarify?"
+            clarification_question = f"{CLARIFICATION_PREFIX} {options[0]} or {options[1]}? Could you please clarify?"
         else:
-            clarification_question = f"It sounds like you might be asking about {', '.join(options[:-1])} or {options[-1]}? Could you please clarify?"
+            clarification_question = f"{CLARIFICATION_PREFIX} {', '.join(options[:-1])} or {options[-1]}? Could you please clarify?"
         return clarification_question
     else:
         log_unanswered_question(user_question_processed) 
-        return "I'm sorry, I don't understand your question. Could you please rephrase or ask about common topics like hours, designs, fabric types, location, or contact?"
+        return FALLBACK_RESPONSE
+
+def response_kind(response):
+    """
+    Classifies a chatbot reply.
+
+    Args:
+        response (str): A reply produced by get_bot_response or build_response.
+
+    Returns:
+        str: ANSWER, CLARIFY or FALLBACK.
+    """
+    if response.startswith(FALLBACK_RESPONSE):
+        return FALLBACK
+    if response.startswith(CLARIFICATION_PREFIX):
+        return CLARIFY
+    return ANSWER
+
+def preprocess_question(user_input, normalizer=default_normalizer):
+    """
+    Normalizes raw user input for matching: lowercase, no punctuation, single spaces.
+
+    Args:
+        user_input (str): The text typed by the user.
+        normalizer (Normalizer): The normalizer the FAQ keywords were processed with.
+
+    Returns:
+        str: The processed question.
+    """
+    return normalizer.normalize_query(user_input)
+
+class ChatSession:
+    """
+    Conversation state for one user.
+
+    Holds what the bot is waiting on between two messages, so the same matching
+    code can serve the console loop and many concurrent server connections.
 
-def run_chatbot():
+    Attributes:
+        session_id (str): Unique identifier of the session.
+        pending_feedback (tuple): (user_question, bot_answer) awaiting a "Was this helpful?"
+                                  reply, or None.
+        pending_clarification (list): FAQ entries offered in the last clarification question.
+        last_seen (float): time.monotonic() of the last message, used to expire idle sessions.
+    """
+
+    def __init__(self, session_id=None):
+        self.session_id = session_id or uuid.uuid4().hex
+        self.pending_feedback = None
+        self.pending_clarification = []
+        self.last_seen = time.monotonic()
+
+    @property
+    def awaiting_feedback(self):
+        return self.pending_feedback is not None
+
+    def ask(self, user_input, faq_index):
+        """
+        Answers one user message and updates the session state.
+
+        A message that follows a clarification question is first matched against
+        only the FAQs offered in that question, so a short reply such as "fabric"
+        resolves the ambiguity. Otherwise the whole knowledge base is searched.
+
+        Args:
+            user_input (str): The text typed by the user.
+            faq_index (FaqIndex): The compiled FAQ index.
+
+        Returns:
+            str: The chatbot's response.
+        """
+        started = time.perf_counter()
+        processed_input, top_contenders = self.prepare_question(user_input, faq_index)
+        if not top_contenders:
+            top_contenders = match_question(processed_input, faq_index)
+        return self.complete_question(user_input, processed_input, top_contenders, started)
+
+    def prepare_question(self, user_input, faq_index):
+        """
+        First half of ask(): everything that happens before the knowledge base is searched.
+
+        Normalizes the message and, if it follows a clarification question, matches
+        it against the FAQs offered there. Callers that search the knowledge base
+        elsewhere (e.g. on a worker process) call this, then complete_question().
+
+        Args:
+            user_input (str): The text typed by the user.
+            faq_index (FaqIndex): The compiled FAQ index.
+
+        Returns:
+            tuple: (processed_input, top_contenders). top_contenders is empty unless
+                   the message resolved a pending clarification.
+        """
+        started = time.perf_counter()
+        self.last_seen = time.monotonic()
+        self.pending_feedback = None
+        processed_input = preprocess_question(user_input, faq_index.normalizer)
+        metrics.record_stage("normalization", time.perf_counter() - started)
+        logger.debug("Processed Input: %r", processed_input)
+
+        top_contenders = []
+        if self.pending_clarification:
+            # Timed as one stage of its own: its matching stages would be counted twice
+            # whenever the reply does not resolve the clarification and goes on to match_question.
+            clarification_started = time.perf_counter()
+            clarification_index = FaqIndex(self.pending_clarification, normalizer=faq_index.normalizer,
+                                           stage_metrics=unrecorded_metrics)
+            top_contenders = clarification_index.top_contenders(processed_input)
+            if len(top_contenders) != 1:
+                top_contenders = []
+            self.pending_clarification = []
+            metrics.record_stage("clarification", time.perf_counter() - clarification_started)
+        return processed_input, top_contenders
+
+    def complete_question(self, user_input, processed_input, top_contenders, started):
+        """
+        Second half of ask(): builds the reply and updates the session state.
+
+        Args:
+            user_input (str): The text typed by the user.
+            processed_input (str): The message as returned by prepare_question().
+            top_contenders (list): The matched FAQ contenders.
+            started (float): time.perf_counter() when the message arrived.
+
+        Returns:
+            str: The chatbot's response.
+        """
+        response = build_response(top_contenders, processed_input)
+        kind = response_kind(response)
+        if kind == ANSWER:
+            self.pending_feedback = (user_input, response)
+        elif kind == CLARIFY:
+            self.pending_clarification = [match_info["faq_entry"] for match_info in top_contenders]
+        metrics.record_request(kind, time.perf_counter() - started)
+        return response
+
+    def give_feedback(self, feedback):
+        """
+        Records the user's reply to "Was this helpful?" for the last answer.
+
+        Args:
+            feedback (str): The user's reply; only 'y' and 'n' are logged.
+
+        Returns:
+            bool: True if feedback was logged, False if there was nothing to rate
+                  or the reply was not 'y' or 'n'.
+        """
+        self.last_seen = time.monotonic()
+        if self.pending_feedback is None:
+            return False
+        user_question, bot_answer = self.pending_feedback
+        self.pending_feedback = None
+        if feedback not in ['y', 'n']:
+            return False
+        log_feedback(user_question, bot_answer, feedback)
+        return True
+
+def run_chatbot(normalizer=None):
     """
     Main function to run the Amaze Africa Fabrics Chatbot.
 
     Initializes the chatbot, loads FAQ data from 'faqs.json', and enters
     into a continuous loop to interact with the user. Handles user input
     processing, gets bot responses, and manages feedback and fallback mechanisms.
+    Edits to 'faqs.json' are picked up while the chatbot is running.
+
+    Args:
+        normalizer (Normalizer): Normalization for keywords and questions; defaults to
+                                 normalizer.default_normalizer.
     """
     print("------------------------------------------------")
     print("Hello! Welcome to Amaze Africa Fabrics.")
     print("I can answer common questions. Type 'bye' to exit.")
     print("------------------------------------------------")
 
+    faq_store = FaqStore('faqs.json', snapshot_file_name=default_snapshot_path('faqs.json'), normalizer=normalizer)
     try:
-        with open('faqs.json', 'r', encoding='utf-8') as f:
-            faq_data = json.load(f)
-        print("DEBUG: FAQ data loaded successfully from faqs.json")
+        faq_store.load()
     except FileNotFoundError:
         print("ERROR: faqs.json not found! Please make sure it's in the same directory.")
         return
     except json.JSONDecodeError:
         print("ERROR: Could not decode faqs.json. Check for syntax errors in your JSON file.")
         return
+    except ValueError as error:
+        print(f"ERROR: faqs.json is not valid FAQ data: {error}")
+        return
+    faq_store.start()
+
+    session = ChatSession()
 
     while True:
         user_input = input("You: ")
 
-        processed_input = user_input.lower()
-        processed_input = processed_input.translate(str.maketrans('', '', string.punctuation))
-        processed_input = ' '.join(processed_input.split())
-
-        print(f"DEBUG: Processed Input: '{processed_input}'")
-
-        if processed_input == 'bye':
-            print("Bot: Thank you for visiting Amaze Africa Fabrics. Goodbye!")
+        if preprocess_question(user_input) == 'bye':
+            print(f"Bot: {GOODBYE_MESSAGE}")
             break
 
-        response = get_bot_response(processed_input, faq_data)
+        response = session.ask(user_input, faq_store.index)
         print(f"Bot: {response}")
 
         # --- "Ask a Human" Fallback Logic ---
-        if response.startswith("I'm sorry, I don't understand"):
-            print("Bot: If you need further assistance, please feel free to email us at support@amasfabrics.com or call us at +233 55 123 4567 during business hours.")
+        if response_kind(response) == FALLBACK:
+            print(f"Bot: {HUMAN_HELP_MESSAGE}")
         # --- END FALLBACK ---
 
         # --- "Was this helpful?" Feedback Prompt ---
-        if not response.startswith("I'm sorry, I don't understand") and \
-           not response.startswith("It sounds like you might be asking about"):
-            
+        if session.awaiting_feedback:
             feedback = input("Bot: Was this helpful? (y/n): ").strip().lower()
-            if feedback in ['y', 'n']:
-                log_feedback(user_input, response, feedback)
-            else:
+            if not session.give_feedback(feedback):
                 print("Bot: Thanks for the feedback!") 
         # --- END FEEDBACK ---
 
 if __name__ == "__main__":
-    run_chatbot()
\ No newline at end of file
+    # Set CHATBOX_LOG_LEVEL=DEBUG to see how each question is matched.
+    logging.basicConfig(level=os.environ.get("CHATBOX_LOG_LEVEL", "WARNING").upper(),
+                        format="%(levelname)s: %(message)s")
+    # Set CHATBOX_FOLD_UNICODE=1 to fold accents (compile the snapshot with --fold-unicode to match).
+    run_chatbot(Normalizer(fold_unicode=os.environ.get("CHATBOX_FOLD_UNICODE") == "1"))
@@ -0,0 +1,47 @@
+# compile_faqs.py
+#
+# Compiles faqs.json into a binary snapshot (normalized keywords, keyword->FAQ
+# mapping and answers) that the chatbot, server.py and replay.py memory-map at
+# startup instead of rebuilding everything. The
+# snapshot is ignored, with a fallback to the JSON file, as soon as faqs.json
+# changes, so re-run this after editing the FAQs.
+#
+# Usage: python compile_faqs.py [--faqs faqs.json] [--output faqs.snapshot] [--fold-unicode]
+
+import argparse
+import json
+import os
+import sys
+
+from faq_snapshot import default_snapshot_path
+from faq_store import compile_faq_snapshot
+from normalizer import Normalizer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile the FAQ file into a snapshot for fast startup.")
+    parser.add_argument("--faqs", default="faqs.json", help="Path to the FAQ JSON file.")
+    parser.add_argument("--output", help="Where to write the snapshot (default: next to --faqs).")
+    parser.add_argument("--fold-unicode", action="store_true",
+                        help="Fold accents and compatibility characters; the bot must be run with the same setting.")
+    args = parser.parse_args()
+
+    snapshot_file_name = args.output or default_snapshot_path(args.faqs)
+    try:
+        faq_index = compile_faq_snapshot(args.faqs, snapshot_file_name, Normalizer(fold_unicode=args.fold_unicode))
+    except FileNotFoundError:
+        print(f"ERROR: {args.faqs} not found!")
+        sys.exit(1)
+    except json.JSONDecodeError:
+        print(f"ERROR: Could not decode {args.faqs}. Check for syntax errors in your JSON file.")
+        sys.exit(1)
+    except ValueError as error:
+        print(f"ERROR: {args.faqs} is not valid FAQ data: {error}")
+        sys.exit(1)
+
+    print(f"Compiled {len(faq_index.faqs)} FAQs ({len(faq_index)} keywords, version {faq_index.version}) "
+          f"into {snapshot_file_name} ({os.path.getsize(snapshot_file_name)} bytes).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+# faq_index.py
+
+import hashlib
+import json
+import time
+from collections import Counter
+from itertools import chain
+
+from fuzzywuzzy import fuzz as fuzzywuzzy_fuzz
+from rapidfuzz import fuzz, process
+
+from metrics import metrics
+from normalizer import default_normalizer
+
+MATCH_THRESHOLD = 80
+CLARIFICATION_THRESHOLD = 10
+
+# Below this many candidates the inverted index is not trusted and every keyword is scored.
+MIN_CANDIDATES = 1
+# Length of the character n-grams in the inverted index. Bigrams, unlike trigrams, are
+# guaranteed to be shared by every keyword/question pair that reaches MATCH_THRESHOLD.
+NGRAM_SIZE = 2
+# That guarantee only holds when the keyword and the question both have at least this many
+# characters, so shorter keywords are always scored and shorter questions get a full scan.
+SHORT_KEYWORD_LENGTH = 6
+# Above this share of all keywords, scoring everything is cheaper than scoring a subset.
+MAX_CANDIDATE_RATIO = 0.5
+# Percent of twice the shorter string's length that an alignment may leave unmatched and
+# still round to MATCH_THRESHOLD: a score of 79.5 leaves 20.5% of 2m, i.e. 41% of m.
+MAX_UNMATCHED_PERCENT = 200 - (2 * MATCH_THRESHOLD - 1)
+
+
+def faq_version(faqs):
+    """
+    Computes a short content hash identifying one version of the FAQ data.
+
+    Args:
+        faqs (list): A list of FAQ dictionaries.
+
+    Returns:
+        str: A hex digest that changes whenever any keyword or answer changes.
+    """
+    canonical = json.dumps(faqs, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def index_terms(text):
+    """
+    Splits text into the terms used by the inverted index.
+
+    Terms are every character bigram of the whole lowercased string. Bigrams span
+    word boundaries so that a partial match across two words still shares terms
+    with the keyword. Whole words are not indexed: any shared word of two or more
+    characters already shares a bigram.
+
+    Args:
+        text (str): A keyword or a processed user question.
+
+    Returns:
+        Counter: Maps each bigram of the text to the number of times it occurs.
+    """
+    text = text.lower()
+    return Counter(text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1))
+
+
+def shared_bigrams_needed(length):
+    """
+    Returns how many of the disjoint bigrams of a string of this length are left
+    intact by any alignment scoring at least MATCH_THRESHOLD (see FaqIndex.candidates).
+    """
+    return length // NGRAM_SIZE - MAX_UNMATCHED_PERCENT * length // 100
+
+
+class FaqIndex:
+    """
+    Precompiled matcher over the FAQ knowledge base.
+
+    Every keyword of every FAQ is normalized once and flattened into one
+    contiguous list, with a parallel list mapping each keyword back to the id
+    (position) of its FAQ. Questions must be normalized with the same
+    `normalizer` before they are matched.
+    A query is then screened against all keywords in a single batched rapidfuzz
+    call instead of one Python-level comparison per keyword, and only the few
+    keywords that pass are scored with fuzzywuzzy, whose scores decide the answer.
+
+    With `prefilter`, an inverted index from character bigrams to keyword ids
+    narrows each query down to the keywords that share enough bigrams with it
+    before any fuzzy scoring happens. The filter never drops a keyword that would
+    reach MATCH_THRESHOLD, but at that threshold it keeps most keywords of a
+    typical catalogue and saves little over the batched scan, so it is off by
+    default and is not stored in snapshots.
+
+    Attributes:
+        faqs (list): The FAQ entries the index was built from.
+        version (str): Content hash of `faqs`, used to key caches of matching results.
+        normalizer (Normalizer): Normalization applied to keywords, and to be applied to questions.
+        keywords (list): All normalized FAQ keywords, flattened in FAQ order.
+        keyword_faq_ids (list): For each entry in `keywords`, the index of its FAQ in `faqs`.
+        postings (dict): Maps each index term to the list of keyword ids containing it,
+                         or None without `prefilter`.
+        short_keyword_ids (list): Ids of keywords that are candidates for every question.
+        min_candidates (int): Candidate count below which the full keyword list is scored.
+        stage_metrics (Metrics): Where the candidate_generation, scoring and disambiguation
+                                 timings of every match are recorded.
+    """
+
+    def __init__(self, faqs, min_candidates=MIN_CANDIDATES, normalizer=None, stage_metrics=None, prefilter=False):
+        """
+        Builds the index from a list of FAQ entries.
+
+        Args:
+            faqs (list): A list of dictionaries, where each dictionary represents an FAQ
+                          with 'keywords' and an 'answer'.
+            min_candidates (int): Candidate count below which the full keyword list is scored.
+            normalizer (Normalizer): Normalization for keywords and questions; defaults to
+                                     normalizer.default_normalizer.
+            stage_metrics (Metrics): Where stage timings are recorded; defaults to metrics.metrics.
+            prefilter (bool): Build the inverted index and score only the candidates it finds.
+        """
+        self.faqs = faqs
+        self.normalizer = normalizer or default_normalizer
+        self.stage_metrics = stage_metrics or metrics
+        self.version = faq_version(faqs)
+        self.min_candidates = min_candidates
+        self.keywords = []
+        self.keyword_faq_ids = []
+        self.postings = {} if prefilter else None
+        self.short_keyword_ids = []
+        for faq_id, faq_entry in enumerate(faqs):
+            for keyword in faq_entry["keywords"]:
+                keyword = self.normalizer.normalize(keyword)
+                keyword_id = len(self.keywords)
+                self.keywords.append(keyword)
+                self.keyword_faq_ids.append(faq_id)
+                if not prefilter:
+                    continue
+                if len(keyword) < SHORT_KEYWORD_LENGTH:
+                    self.short_keyword_ids.append(keyword_id)
+                    continue
+                for term in index_terms(keyword):
+                    self.postings.setdefault(term, []).append(keyword_id)
+
+    @classmethod
+    def from_parts(cls, faqs, version, normalizer, keywords, keyword_faq_ids, min_candidates=MIN_CANDIDATES):
+        """
+        Assembles an index from structures that were built earlier, e.g. loaded from a snapshot.
+
+        The sequences only need to support len() and indexing, so they can be views
+        over memory-mapped data.
+
+        Returns:
+            FaqIndex: An index equivalent to FaqIndex(faqs, normalizer=normalizer).
+        """
+        faq_index = cls.__new__(cls)
+        faq_index.faqs = faqs
+        faq_index.version = version
+        faq_index.normalizer = normalizer
+        faq_index.stage_metrics = metrics
+        faq_index.min_candidates = min_candidates
+        faq_index.keywords = keywords
+        faq_index.keyword_faq_ids = keyword_faq_ids
+        faq_index.short_keyword_ids = []
+        faq_index.postings = None
+        return faq_index
+
+    def __len__(self):
+        return len(self.keywords)
+
+    def candidates(self, user_question_processed):
+        """
+        Looks up the keywords sharing enough bigrams with the question, plus every
+        short keyword. A short question, or an index built without `prefilter`,
+        gets the full scan.
+
+        No keyword that could reach MATCH_THRESHOLD is left out. partial_ratio
+        aligns the shorter string (m characters) with a window of at most m
+        characters of the longer one. Cut the shorter string into m // 2 disjoint
+        bigrams: each of its characters left unmatched, and each window character
+        inserted between two matched ones, breaks at most one of them. A score of
+        79.5 allows at most 0.41m such characters, so at least
+        shared_bigrams_needed(m) bigram occurrences survive intact in both strings,
+        which is at least one once m >= SHORT_KEYWORD_LENGTH. Each distinct bigram
+        the two share accounts for at most as many of those as the question's most
+        repeated bigram occurs, so the keyword shares at least that many times fewer
+        distinct bigrams with the question.
+
+        Args:
+            user_question_processed (str): The user's question after preprocessing.
+
+        Returns:
+            dict: Maps candidate keyword ids to their keywords, or None when there are
+                  too few or too many candidates and every keyword should be scored.
+        """
+        question_length = len(user_question_processed)
+        if self.postings is None or question_length < SHORT_KEYWORD_LENGTH:
+            return None
+        max_candidates = len(self.keywords) * MAX_CANDIDATE_RATIO
+        candidate_ids = set(self.short_keyword_ids)
+        if len(candidate_ids) > max_candidates:
+            return None
+
+        terms = index_terms(user_question_processed)
+        repeats = max(terms.values())
+        # Distinct shared bigrams needed, by min(keyword length, question length).
+        needed = [-(-shared_bigrams_needed(length) // repeats) for length in range(question_length + 1)]
+        shared = Counter(chain.from_iterable(self.postings.get(term, ()) for term in terms))
+        for keyword_id, shared_count in shared.items():
+            if shared_count >= needed[min(len(self.keywords[keyword_id]), question_length)]:
+                candidate_ids.add(keyword_id)
+                if len(candidate_ids) > max_candidates:
+                    return None
+
+        if len(candidate_ids) < self.min_candidates:
+            return None
+        return {keyword_id: self.keywords[keyword_id] for keyword_id in sorted(candidate_ids)}
+
+    def score(self, user_question_processed, exhaustive=False):
+        """
+        Scores a processed question against the candidate keywords in one batched call.
+
+        rapidfuzz's partial_ratio tries every alignment of the shorter string, so it is
+        never lower than fuzzywuzzy's, which only tries the alignments its matching
+        blocks suggest. Keywords below MATCH_THRESHOLD in rapidfuzz can therefore never
+        match and are cut inside the batched call. The survivors are rescored with
+        fuzzywuzzy.fuzz.partial_ratio(keyword, question), exactly as the original
+        per-keyword loop did, so matches and disambiguation are unchanged.
+
+        Args:
+            user_question_processed (str): The user's question after preprocessing.
+            exhaustive (bool): Skip the inverted index, if any, and score every keyword.
+
+        Returns:
+            list: (faq_id, score) tuples, in FAQ order, for every FAQ whose best keyword
+                  score reaches MATCH_THRESHOLD.
+        """
+        started = time.perf_counter()
+        choices = None if exhaustive else self.candidates(user_question_processed)
+        if choices is None:
+            choices = self.keywords
+        scoring_started = time.perf_counter()
+        self.stage_metrics.record_stage("candidate_generation", scoring_started - started)
+
+        faq_scores = {}
+        results = process.extract(
+            user_question_processed,
+            choices,
+            scorer=fuzz.partial_ratio,
+            score_cutoff=MATCH_THRESHOLD - 0.5,
+            limit=None,
+        )
+        for keyword, _, keyword_id in results:
+            score = fuzzywuzzy_fuzz.partial_ratio(keyword, user_question_processed)
+            if score < MATCH_THRESHOLD:
+                continue
+            faq_id = self.keyword_faq_ids[keyword_id]
+            if score > faq_scores.get(faq_id, 0):
+                faq_scores[faq_id] = score
+        faq_scores = sorted(faq_scores.items())
+        self.stage_metrics.record_stage("scoring", time.perf_counter() - scoring_started)
+        return faq_scores
+
+    def top_contenders(self, user_question_processed, exhaustive=False):
+        """
+        Returns the FAQs close enough to the best match to be considered answers.
+
+        An FAQ is a contender when its score is within CLARIFICATION_THRESHOLD of the
+        best score. One contender means a direct answer, several mean the bot should
+        ask for clarification, and none means the question is unanswered.
+
+        Args:
+            user_question_processed (str): The user's question after preprocessing.
+            exhaustive (bool): Skip the inverted index, if any, and score every keyword.
+
+        Returns:
+            list: Dictionaries with 'faq_id', 'faq_entry' and 'score', in FAQ order.
+        """
+        faq_scores = self.score(user_question_processed, exhaustive)
+        if not faq_scores:
+            return []
+        started = time.perf_counter()
+        best_match_score = max(score for _, score in faq_scores)
+        top_contenders = [
+            {"faq_id": faq_id, "faq_entry": self.faqs[faq_id], "score": score}
+            for faq_id, score in faq_scores
+            if score >= (best_match_score - CLARIFICATION_THRESHOLD)
+        ]
+        self.stage_metrics.record_stage("disambiguation", time.perf_counter() - started)
+        return top_contenders
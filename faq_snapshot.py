@@ -0,0 +1,219 @@
+# faq_snapshot.py
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from collections.abc import Sequence
+
+from faq_index import FaqIndex
+from normalizer import default_normalizer
+
+MAGIC = b"AAFSNAP\0"
+FORMAT_VERSION = 3
+SNAPSHOT_SUFFIX = ".snapshot"
+
+SECTIONS = [
+    "faq_offsets",        # uint64 per FAQ + 1, into faq_blob
+    "faq_blob",           # UTF-8 JSON of each FAQ entry, back to back
+    "keyword_blob",       # normalized keywords joined by "\n"
+    "keyword_faq_ids",    # uint32 per keyword
+]
+
+# memoryview.cast() format of each numeric section; the others are raw bytes.
+SECTION_FORMATS = {
+    "faq_offsets": "Q",
+    "keyword_faq_ids": "I",
+}
+
+# magic, format version, fold_unicode, source key (sha256), FAQ version, CRC-32 of everything
+# after the header, then (offset, length) per section. fold_unicode is also part of the source
+# key; it is checked on its own when a snapshot is read without its source.
+HEADER = struct.Struct("<8sIB3x32s16sI4x" + "QQ" * len(SECTIONS))
+ALIGNMENT = 8
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot is missing, corrupt, from another format version, or stale."""
+
+
+def default_snapshot_path(faq_file_name):
+    """
+    Returns where the snapshot for an FAQ file lives by default: faqs.json -> faqs.snapshot.
+    """
+    return os.path.splitext(faq_file_name)[0] + SNAPSHOT_SUFFIX
+
+
+def source_key(source, normalizer):
+    """
+    Hashes the raw FAQ file together with everything else that shapes the compiled index.
+
+    A snapshot is only used when this key matches, so editing faqs.json, changing
+    the normalizer or changing the file layout all make the snapshot stale.
+
+    Args:
+        source (bytes): The raw contents of the FAQ JSON file.
+        normalizer (Normalizer): The normalizer the index is built with.
+
+    Returns:
+        bytes: A 32-byte SHA-256 digest.
+    """
+    params = f"{FORMAT_VERSION}|{int(normalizer.fold_unicode)}|".encode("ascii")
+    return hashlib.sha256(params + source).digest()
+
+
+def _u32(values):
+    return struct.pack(f"<{len(values)}I", *values)
+
+
+def _u64(values):
+    return struct.pack(f"<{len(values)}Q", *values)
+
+
+def write_snapshot(faq_index, source, snapshot_file_name):
+    """
+    Serializes a compiled FaqIndex into a snapshot file.
+
+    The file is written next to its final name and renamed into place, so
+    processes that already memory-mapped the previous snapshot keep reading it.
+
+    Args:
+        faq_index (FaqIndex): The index built from `source`.
+        source (bytes): The raw FAQ JSON the index was built from.
+        snapshot_file_name (str): Where to write the snapshot.
+    """
+    faq_chunks = [json.dumps(faq_entry, ensure_ascii=False).encode("utf-8") for faq_entry in faq_index.faqs]
+    faq_offsets = [0]
+    for chunk in faq_chunks:
+        faq_offsets.append(faq_offsets[-1] + len(chunk))
+
+    sections = {
+        "faq_offsets": _u64(faq_offsets),
+        "faq_blob": b"".join(faq_chunks),
+        "keyword_blob": "\n".join(faq_index.keywords).encode("utf-8"),
+        "keyword_faq_ids": _u32(faq_index.keyword_faq_ids),
+    }
+
+    layout = []
+    body = bytearray()
+    for name in SECTIONS:
+        body.extend(b"\0" * (-(HEADER.size + len(body)) % ALIGNMENT))
+        layout.extend([HEADER.size + len(body), len(sections[name])])
+        body.extend(sections[name])
+
+    header = HEADER.pack(
+        MAGIC, FORMAT_VERSION, int(faq_index.normalizer.fold_unicode),
+        source_key(source, faq_index.normalizer), faq_index.version.encode("ascii"), zlib.crc32(body), *layout,
+    )
+    temporary_file_name = snapshot_file_name + ".tmp"
+    with open(temporary_file_name, "wb") as snapshot_file:
+        snapshot_file.write(header)
+        snapshot_file.write(body)
+    os.replace(temporary_file_name, snapshot_file_name)
+
+
+class SnapshotFaqs(Sequence):
+    """
+    FAQ entries decoded one at a time from the memory-mapped snapshot.
+
+    Only the entries that are actually answered are ever parsed. read_snapshot()
+    has already checked the blob against the snapshot's checksum, so they parse.
+    """
+
+    def __init__(self, offsets, blob):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, faq_id):
+        if isinstance(faq_id, slice):
+            return [self[i] for i in range(*faq_id.indices(len(self)))]
+        if faq_id < 0:
+            faq_id += len(self)
+        return json.loads(bytes(self._blob[self._offsets[faq_id]:self._offsets[faq_id + 1]]))
+
+
+def _split_blob(blob, count):
+    strings = bytes(blob).decode("utf-8").split("\n") if count else []
+    if len(strings) != count:
+        raise ValueError(f"expected {count} strings, found {len(strings)}")
+    return strings
+
+
+def read_snapshot(snapshot_file_name, source=None, normalizer=None):
+    """
+    Memory-maps a snapshot and assembles a FaqIndex from it.
+
+    Numeric arrays and FAQ entries stay in the mapped pages, which the operating
+    system shares between every process that maps the same file. Keywords are
+    decoded into Python strings, since the fuzzy scorer needs them.
+
+    Args:
+        snapshot_file_name (str): The snapshot to load.
+        source (bytes): The raw contents of the current FAQ JSON file, or None to take
+                        the snapshot as it is, e.g. one published by a FaqStore.
+        normalizer (Normalizer): The normalizer questions will be processed with.
+
+    Returns:
+        FaqIndex: The index stored in the snapshot.
+
+    Raises:
+        SnapshotError: If the snapshot is missing, unreadable, corrupt, from another
+                       format version, or was compiled from different FAQ data.
+    """
+    normalizer = normalizer or default_normalizer
+    if sys.byteorder != "little":
+        # Arrays are stored little-endian and read with native-order casts.
+        raise SnapshotError("Snapshots can only be mapped on little-endian machines")
+    try:
+        with open(snapshot_file_name, "rb") as snapshot_file:
+            mapped = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError) as error:
+        raise SnapshotError(f"Cannot map {snapshot_file_name}: {error}")
+
+    if len(mapped) < HEADER.size:
+        raise SnapshotError(f"{snapshot_file_name} is truncated")
+    magic, format_version, fold_unicode, stored_key, version, checksum, *layout = HEADER.unpack_from(mapped)
+    if magic != MAGIC or format_version != FORMAT_VERSION:
+        raise SnapshotError(f"{snapshot_file_name} is not a version {FORMAT_VERSION} FAQ snapshot")
+    if source is None:
+        if fold_unicode != int(normalizer.fold_unicode):
+            raise SnapshotError(f"{snapshot_file_name} was compiled with other normalizer settings")
+    elif stored_key != source_key(source, normalizer):
+        raise SnapshotError(f"{snapshot_file_name} is stale")
+
+    # Everything after the header is checked here, once, so that nothing decoded
+    # later (FAQ entries, keyword and FAQ ids) can fail while answering a question.
+    view = memoryview(mapped)
+    if zlib.crc32(view[HEADER.size:]) != checksum:
+        raise SnapshotError(f"{snapshot_file_name} is corrupt (checksum mismatch)")
+
+    sections = {}
+    for position, name in enumerate(SECTIONS):
+        offset, length = layout[2 * position], layout[2 * position + 1]
+        if offset + length > len(mapped):
+            raise SnapshotError(f"{snapshot_file_name} is truncated")
+        section = view[offset:offset + length]
+        if name in SECTION_FORMATS:
+            item_size = struct.calcsize(SECTION_FORMATS[name])
+            if offset % item_size or length % item_size:
+                raise SnapshotError(f"{snapshot_file_name} is corrupt: section {name} is misaligned")
+            section = section.cast(SECTION_FORMATS[name])
+        sections[name] = section
+
+    try:
+        return FaqIndex.from_parts(
+            faqs=SnapshotFaqs(sections["faq_offsets"], sections["faq_blob"]),
+            version=version.decode("ascii"),
+            normalizer=normalizer,
+            keywords=_split_blob(sections["keyword_blob"], len(sections["keyword_faq_ids"])),
+            keyword_faq_ids=sections["keyword_faq_ids"],
+        )
+    except ValueError as error:
+        # UnicodeDecodeError is a ValueError; callers would take it for bad FAQ data.
+        raise SnapshotError(f"{snapshot_file_name} is corrupt: {error}")
@@ -0,0 +1,228 @@
+# faq_store.py
+
+import json
+import logging
+import os
+import shutil
+import threading
+
+from faq_index import FaqIndex
+from faq_snapshot import SnapshotError, SnapshotFaqs, read_snapshot, write_snapshot
+
+POLL_INTERVAL = 2.0
+
+logger = logging.getLogger("chatbox.faq_store")
+
+
+def validate_faqs(faqs):
+    """
+    Checks that decoded FAQ data has the shape the matcher expects.
+
+    Args:
+        faqs: The decoded contents of the FAQ JSON file.
+
+    Raises:
+        ValueError: If the data is not a list of entries with a non-empty list of
+                    string 'keywords' and a string 'answer'.
+    """
+    if not isinstance(faqs, list):
+        raise ValueError("FAQ data must be a list of entries")
+    for position, faq_entry in enumerate(faqs):
+        if not isinstance(faq_entry, dict):
+            raise ValueError(f"FAQ entry {position} must be an object")
+        keywords = faq_entry.get("keywords")
+        if not isinstance(keywords, list) or not keywords or \
+           not all(isinstance(keyword, str) and keyword for keyword in keywords):
+            raise ValueError(f"FAQ entry {position} needs a non-empty list of non-empty string 'keywords'")
+        if not isinstance(faq_entry.get("answer"), str):
+            raise ValueError(f"FAQ entry {position} needs a string 'answer'")
+
+
+def load_faq_index(faq_file_name, snapshot_file_name=None, normalizer=None):
+    """
+    Reads, validates and compiles the FAQ knowledge base.
+
+    When a snapshot file is given and was compiled from the current contents of
+    the FAQ file, the index is memory-mapped from it instead of being rebuilt.
+    A missing, corrupt or stale snapshot falls back to the JSON file.
+
+    Args:
+        faq_file_name (str): Path to the FAQ JSON file.
+        snapshot_file_name (str): Path to a snapshot written by compile_faq_snapshot, or None.
+        normalizer (Normalizer): Normalization for keywords and questions; defaults to
+                                 normalizer.default_normalizer. A snapshot compiled with
+                                 different settings is stale.
+
+    Returns:
+        FaqIndex: The compiled index.
+
+    Raises:
+        FileNotFoundError: If the FAQ file does not exist.
+        json.JSONDecodeError: If the FAQ file is not valid JSON.
+        ValueError: If the FAQ data does not have the expected shape.
+    """
+    with open(faq_file_name, 'rb') as f:
+        source = f.read()
+    return _index_from_source(source, faq_file_name, snapshot_file_name, normalizer)
+
+
+def _index_from_source(source, faq_file_name, snapshot_file_name, normalizer):
+    if snapshot_file_name:
+        try:
+            return read_snapshot(snapshot_file_name, source, normalizer)
+        except SnapshotError as error:
+            logger.info("Not using snapshot, loading %s instead: %s", faq_file_name, error)
+    faq_data = json.loads(source)
+    validate_faqs(faq_data)
+    return FaqIndex(faq_data, normalizer=normalizer)
+
+
+def compile_faq_snapshot(faq_file_name, snapshot_file_name, normalizer=None):
+    """
+    Compiles the FAQ file into a snapshot for fast startup.
+
+    Args:
+        faq_file_name (str): Path to the FAQ JSON file.
+        snapshot_file_name (str): Where to write the snapshot.
+        normalizer (Normalizer): As for load_faq_index; the bot must load the snapshot
+                                 with the same settings.
+
+    Returns:
+        FaqIndex: The compiled index.
+
+    Raises:
+        FileNotFoundError, json.JSONDecodeError, ValueError: As for load_faq_index.
+    """
+    with open(faq_file_name, 'rb') as f:
+        source = f.read()
+    faq_data = json.loads(source)
+    validate_faqs(faq_data)
+    faq_index = FaqIndex(faq_data, normalizer=normalizer)
+    write_snapshot(faq_index, source, snapshot_file_name)
+    return faq_index
+
+
+class FaqStore:
+    """
+    Holds the live FaqIndex and swaps in a new one when the FAQ file changes.
+
+    A daemon thread polls the file's modification time and size. On a change it
+    loads and compiles the new data off the request path, then replaces `index`
+    with a single attribute assignment. Readers take `store.index` once per
+    question without locking; a question already being matched keeps the
+    snapshot it started with. If the new file is missing, malformed or invalid,
+    the error is reported and the previous snapshot stays live.
+
+    With `publish_file_name`, every index is also written there as a snapshot
+    before it goes live, so other processes can map exactly the FAQ data this
+    store accepted instead of reading faqs.json themselves.
+
+    Attributes:
+        faq_file_name (str): Path to the FAQ JSON file.
+        snapshot_file_name (str): Compiled snapshot to try before the FAQ file, or None.
+        poll_interval (float): Seconds between checks for changes.
+        normalizer (Normalizer): Normalization every loaded index is built with, or None
+                                 for normalizer.default_normalizer.
+        publish_file_name (str): Where accepted indexes are published as snapshots, or None.
+        index (FaqIndex): The current snapshot.
+    """
+
+    def __init__(self, faq_file_name="faqs.json", poll_interval=POLL_INTERVAL, snapshot_file_name=None,
+                 normalizer=None, publish_file_name=None):
+        self.faq_file_name = faq_file_name
+        self.snapshot_file_name = snapshot_file_name
+        self.normalizer = normalizer
+        self.publish_file_name = publish_file_name
+        self.poll_interval = poll_interval
+        self.index = None
+        self._file_stamp = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.faq_file_name)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load_index(self):
+        with open(self.faq_file_name, 'rb') as f:
+            source = f.read()
+        faq_index = _index_from_source(source, self.faq_file_name, self.snapshot_file_name, self.normalizer)
+        if self.publish_file_name:
+            self._publish(faq_index, source)
+        return faq_index
+
+    def _publish(self, faq_index, source):
+        """
+        Writes an accepted index to publish_file_name, replacing the previous one.
+
+        An index mapped from the compiled snapshot is published by copying that
+        file, which is far cheaper than serializing it again. The copy is only kept
+        if it still holds the same data, since the file may have been recompiled
+        since it was mapped.
+        """
+        temporary_file_name = self.publish_file_name + ".tmp"
+        if isinstance(faq_index.faqs, SnapshotFaqs):
+            shutil.copyfile(self.snapshot_file_name, temporary_file_name)
+            try:
+                copied_version = read_snapshot(temporary_file_name, source, self.normalizer).version
+            except SnapshotError:
+                copied_version = None
+            if copied_version == faq_index.version:
+                os.replace(temporary_file_name, self.publish_file_name)
+                return
+        write_snapshot(faq_index, source, self.publish_file_name)
+
+    def load(self):
+        """
+        Loads the initial snapshot.
+
+        Raises:
+            FileNotFoundError, json.JSONDecodeError, ValueError: As for load_faq_index.
+            OSError: If the index cannot be published.
+        """
+        self._file_stamp = self._stat()
+        self.index = self._load_index()
+        logger.debug("FAQ data loaded successfully from %s (%d keywords indexed)", self.faq_file_name, len(self.index))
+        return self.index
+
+    def reload_if_changed(self):
+        """
+        Rebuilds and swaps in the index if the FAQ file changed since the last check.
+
+        Returns:
+            bool: True if a new snapshot was swapped in.
+        """
+        file_stamp = self._stat()
+        if file_stamp == self._file_stamp:
+            return False
+        # Remember the stamp even if loading fails, so a broken file is reported once.
+        self._file_stamp = file_stamp
+        try:
+            new_index = self._load_index()
+        except (OSError, ValueError) as error:
+            logger.error("Rejected changes to %s, keeping the previous FAQ data: %s", self.faq_file_name, error)
+            return False
+        self.index = new_index
+        logger.info("Reloaded %s (%d keywords indexed, version %s)", self.faq_file_name, len(new_index), new_index.version)
+        return True
+
+    def start(self):
+        """
+        Starts watching the FAQ file in a background thread.
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._watch, name="faq-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            self.reload_if_changed()
@@ -0,0 +1,118 @@
+# log_writer.py
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+BATCH_SIZE = 100
+FLUSH_INTERVAL = 1.0
+MAX_BYTES = 10 * 1024 * 1024
+BACKUP_COUNT = 5
+
+_CLOSE = object()
+
+logger = logging.getLogger("chatbox.log_writer")
+
+
+class JsonlLogWriter:
+    """
+    Background writer that appends records to a JSON Lines file.
+
+    Callers only put records on a queue, so the request path never waits on
+    disk. A daemon thread drains the queue and writes records in batches: as
+    soon as BATCH_SIZE records are waiting, every FLUSH_INTERVAL seconds
+    otherwise, and once more on close() or interpreter exit. When the file
+    would grow past max_bytes it is rotated to `<name>.1`, `<name>.2`, ... like
+    logging.handlers.RotatingFileHandler.
+
+    Attributes:
+        file_name (str): Path of the JSON Lines file.
+        batch_size (int): Number of queued records that triggers a write.
+        flush_interval (float): Maximum seconds a record waits before being written.
+        max_bytes (int): Size at which the file is rotated; 0 disables rotation.
+        backup_count (int): Number of rotated files to keep.
+    """
+
+    def __init__(self, file_name, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL,
+                 max_bytes=MAX_BYTES, backup_count=BACKUP_COUNT):
+        self.file_name = file_name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        atexit.register(self.close)
+
+    def write(self, record):
+        """
+        Queues one record for writing. Never blocks on disk.
+
+        Args:
+            record (dict): A JSON-serializable record.
+        """
+        if self._thread is None:
+            self._start()
+        self._queue.put(record)
+
+    def close(self):
+        """
+        Writes every queued record and stops the writer thread.
+        """
+        with self._start_lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_CLOSE)
+            thread.join()
+
+    def _start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"log-writer:{self.file_name}", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        closing = False
+        while not closing:
+            try:
+                record = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                if record is _CLOSE:
+                    closing = True
+                else:
+                    batch.append(record)
+            except queue.Empty:
+                pass
+
+            if closing or len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                if batch:
+                    try:
+                        self._flush(batch)
+                    except OSError as error:
+                        logger.error("Could not write %d records to %s: %s", len(batch), self.file_name, error)
+                    batch = []
+                deadline = time.monotonic() + self.flush_interval
+
+    def _flush(self, batch):
+        data = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in batch).encode("utf-8")
+        if self.max_bytes and os.path.exists(self.file_name) and \
+           os.path.getsize(self.file_name) + len(data) > self.max_bytes:
+            self._rotate()
+        with open(self.file_name, "ab") as log_file:
+            log_file.write(data)
+
+    def _rotate(self):
+        if self.backup_count <= 0:
+            os.remove(self.file_name)
+            return
+        for number in range(self.backup_count - 1, 0, -1):
+            source = f"{self.file_name}.{number}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.file_name}.{number + 1}")
+        os.replace(self.file_name, f"{self.file_name}.1")
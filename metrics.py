@@ -0,0 +1,151 @@
+# metrics.py
+
+import bisect
+import json
+import threading
+from collections import Counter
+
+# Upper bounds, in milliseconds, of the request latency histogram buckets.
+LATENCY_BUCKETS_MS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500]
+
+STAGES = ["normalization", "clarification", "candidate_generation", "scoring", "disambiguation", "logging"]
+
+
+class Metrics:
+    """
+    In-process counters and timings for the question-answering hot path.
+
+    Records how long each stage of answering a question takes, how many
+    questions ended in each outcome (answer, clarify, fallback) and a histogram
+    of end-to-end latency. Recording is a few additions under a lock; setting
+    `enabled` to False turns every record call into an immediate return.
+
+    Attributes:
+        enabled (bool): Whether record calls do anything.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._stages = {stage: [0, 0.0, 0.0] for stage in STAGES}
+            self._outcomes = Counter()
+            self._latency_buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+            self._latency_count = 0
+            self._latency_sum = 0.0
+            self._latency_max = 0.0
+
+    def record_stage(self, stage, seconds):
+        """
+        Adds one timing for a stage.
+
+        Args:
+            stage (str): One of STAGES.
+            seconds (float): Time spent in the stage.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            totals = self._stages.setdefault(stage, [0, 0.0, 0.0])
+            totals[0] += 1
+            totals[1] += seconds
+            if seconds > totals[2]:
+                totals[2] = seconds
+
+    def record_request(self, outcome, seconds):
+        """
+        Counts one answered question and adds its latency to the histogram.
+
+        Args:
+            outcome (str): ANSWER, CLARIFY or FALLBACK.
+            seconds (float): End-to-end time spent answering.
+        """
+        if not self.enabled:
+            return
+        milliseconds = seconds * 1000
+        with self._lock:
+            self._outcomes[outcome] += 1
+            self._latency_buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, milliseconds)] += 1
+            self._latency_count += 1
+            self._latency_sum += milliseconds
+            if milliseconds > self._latency_max:
+                self._latency_max = milliseconds
+
+    def stage_totals(self):
+        """
+        Returns the raw stage totals, for merging into the Metrics of another process.
+
+        Returns:
+            dict: (count, total seconds, max seconds) per stage that was recorded at least once.
+        """
+        with self._lock:
+            return {stage: tuple(totals) for stage, totals in self._stages.items() if totals[0]}
+
+    def merge_stages(self, stage_totals):
+        """
+        Adds stage totals recorded elsewhere, e.g. by a worker process.
+
+        Args:
+            stage_totals (dict): As returned by stage_totals().
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            for stage, (count, total, maximum) in stage_totals.items():
+                totals = self._stages.setdefault(stage, [0, 0.0, 0.0])
+                totals[0] += count
+                totals[1] += total
+                if maximum > totals[2]:
+                    totals[2] = maximum
+
+    def snapshot(self):
+        """
+        Returns a copy of every metric as plain data.
+
+        Returns:
+            dict: 'stages' (count, total_ms, mean_ms and max_ms per stage), 'outcomes'
+                  (count per outcome) and 'latency_ms' (count, sum, max and a bucket
+                  histogram keyed by upper bound).
+        """
+        with self._lock:
+            stages = {
+                stage: {
+                    "count": count,
+                    "total_ms": total * 1000,
+                    "mean_ms": total * 1000 / count if count else 0.0,
+                    "max_ms": maximum * 1000,
+                }
+                for stage, (count, total, maximum) in self._stages.items()
+            }
+            bounds = [str(bound) for bound in LATENCY_BUCKETS_MS] + ["+Inf"]
+            return {
+                "stages": stages,
+                "outcomes": dict(self._outcomes),
+                "latency_ms": {
+                    "count": self._latency_count,
+                    "sum": self._latency_sum,
+                    "max": self._latency_max,
+                    "buckets": dict(zip(bounds, self._latency_buckets)),
+                },
+            }
+
+    def to_json(self, **extra):
+        """
+        Serializes the snapshot, plus any extra sections, as JSON.
+        """
+        return json.dumps({**self.snapshot(), **extra}, indent=2)
+
+    def dump(self, file_name, **extra):
+        """
+        Writes the snapshot, plus any extra sections, to a JSON file.
+        """
+        with open(file_name, "w", encoding="utf-8") as metrics_file:
+            metrics_file.write(self.to_json(**extra))
+
+
+metrics = Metrics()
+# For matching whose stages must not be counted as requests, e.g. a clarification follow-up.
+unrecorded_metrics = Metrics(enabled=False)
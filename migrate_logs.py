@@ -0,0 +1,93 @@
+# migrate_logs.py
+#
+# One-shot conversion of the old text logs to the JSON Lines format written by
+# log_writer.JsonlLogWriter:
+#
+#   unanswered_questions.log  [ts] question
+#   feedback.log              [ts] Q: '...' | A: '...' | Helpful: y
+#
+# The old files are left in place. Lines that cannot be parsed are kept as
+# {"timestamp": null, "raw": line} so nothing is lost.
+#
+# Usage: python migrate_logs.py [--force]
+
+import argparse
+import json
+import os
+import re
+
+from chatbox import FEEDBACK_LOG_FILE, UNANSWERED_LOG_FILE
+
+UNANSWERED_LINE = re.compile(r"^\[(?P<timestamp>[^\]]+)\] (?P<question>.*)$")
+# The old format did not escape quotes or pipes, so the question is taken up to the
+# first "' | A: '" and the answer up to the last "' | Helpful: ".
+FEEDBACK_LINE = re.compile(
+    r"^\[(?P<timestamp>[^\]]+)\] Q: '(?P<question>.*?)' \| A: '(?P<answer>.*)' \| Helpful: (?P<helpful>\S*)$"
+)
+
+
+def parse_unanswered(match):
+    return {"timestamp": match["timestamp"], "question": match["question"]}
+
+
+def parse_feedback(match):
+    return {
+        "timestamp": match["timestamp"],
+        "question": match["question"],
+        "answer": match["answer"],
+        "helpful": match["helpful"],
+    }
+
+
+def migrate(source, destination, pattern, parse):
+    """
+    Converts one text log into a JSON Lines file, streaming line by line.
+
+    Args:
+        source (str): Path of the old text log.
+        destination (str): Path of the JSON Lines file to create.
+        pattern (re.Pattern): Regular expression for one log line.
+        parse (callable): Builds the record dictionary from a match.
+
+    Returns:
+        tuple: (records written, lines that could not be parsed).
+    """
+    written = unparsed = 0
+    with open(source, "r", encoding="utf-8") as old_log, open(destination, "w", encoding="utf-8") as new_log:
+        for line in old_log:
+            line = line.rstrip("\n")
+            if not line:
+                continue
+            match = pattern.match(line)
+            if match:
+                record = parse(match)
+            else:
+                record = {"timestamp": None, "raw": line}
+                unparsed += 1
+            new_log.write(json.dumps(record, ensure_ascii=False) + "\n")
+            written += 1
+    return written, unparsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert the old .log files to JSON Lines.")
+    parser.add_argument("--force", action="store_true", help="Overwrite existing .jsonl files.")
+    args = parser.parse_args()
+
+    migrations = [
+        ("unanswered_questions.log", UNANSWERED_LOG_FILE, UNANSWERED_LINE, parse_unanswered),
+        ("feedback.log", FEEDBACK_LOG_FILE, FEEDBACK_LINE, parse_feedback),
+    ]
+    for source, destination, pattern, parse in migrations:
+        if not os.path.exists(source):
+            print(f"Skipping {source}: not found.")
+            continue
+        if os.path.exists(destination) and not args.force:
+            print(f"Skipping {source}: {destination} already exists (use --force to overwrite).")
+            continue
+        written, unparsed = migrate(source, destination, pattern, parse)
+        print(f"Migrated {written} records from {source} to {destination} ({unparsed} unparsed).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# normalizer.py
+
+import functools
+import string
+import unicodedata
+
+QUERY_CACHE_SIZE = 8192
+
+# Typographic punctuation that NFKD folding leaves alone, removed along with
+# string.punctuation when Unicode folding is on.
+UNICODE_PUNCTUATION = "‘’‚‛“”„–—…«»¡¿"
+
+
+class Normalizer:
+    """
+    Text normalization shared by FAQ keywords and user questions.
+
+    Lowercases, strips punctuation and collapses whitespace, the same steps the
+    console loop used to run inline, but with the translation table built once.
+    With `fold_unicode` it also applies NFKD compatibility folding, drops
+    accents and uses casefold(), so "Café" and "cafe" or full-width "！" and "!"
+    normalize alike.
+
+    normalize() does the work every time and is used for keywords at load time.
+    normalize_query() wraps it in an LRU cache, so a question that has been seen
+    recently costs a dictionary lookup.
+
+    Attributes:
+        fold_unicode (bool): Whether Unicode folding is applied.
+    """
+
+    def __init__(self, fold_unicode=False, query_cache_size=QUERY_CACHE_SIZE):
+        self.fold_unicode = fold_unicode
+        self._query_cache_size = query_cache_size
+        deleted = string.punctuation + (UNICODE_PUNCTUATION if fold_unicode else "")
+        self._table = str.maketrans('', '', deleted)
+        self.normalize_query = functools.lru_cache(maxsize=query_cache_size)(self.normalize)
+
+    def __reduce__(self):
+        # Worker processes get the same settings and start with an empty query cache.
+        return Normalizer, (self.fold_unicode, self._query_cache_size)
+
+    def normalize(self, text):
+        """
+        Normalizes text without using the query cache.
+
+        Args:
+            text (str): A keyword or raw user input.
+
+        Returns:
+            str: The normalized text.
+        """
+        if self.fold_unicode:
+            text = unicodedata.normalize("NFKD", text)
+            text = "".join(char for char in text if not unicodedata.combining(char)).casefold()
+        else:
+            text = text.lower()
+        return ' '.join(text.translate(self._table).split())
+
+
+default_normalizer = Normalizer()
@@ -0,0 +1,237 @@
+# replay.py
+#
+# Offline batch evaluation: streams a file of questions through the matcher
+# without prompts and records what the bot would do with each one.
+#
+# Accepted input lines:
+#   * JSON Lines records (unanswered_questions.jsonl, feedback.jsonl, ...);
+#     the question is read from --field (default "question")
+#   * the old text logs ("[ts] question" and "[ts] Q: '...' | A: ...")
+#   * plain text, one question per line
+#
+# Usage:
+#   python replay.py unanswered_questions.jsonl --output run.jsonl
+#   python replay.py unanswered_questions.jsonl --output new.jsonl --previous run.jsonl --diff changes.jsonl
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+from chatbox import ANSWER, CLARIFY, FALLBACK, preprocess_question
+from faq_snapshot import default_snapshot_path
+from faq_store import load_faq_index
+from migrate_logs import FEEDBACK_LINE, UNANSWERED_LINE
+from normalizer import Normalizer
+
+BATCH_SIZE = 1000
+
+_faq_index = None
+
+
+def read_question(line, field):
+    """
+    Extracts the question from one input line.
+
+    Args:
+        line (str): A line of the input file, without the trailing newline.
+        field (str): Key holding the question in JSON records.
+
+    Returns:
+        str: The question, or None if the line holds no question.
+    """
+    if line.startswith("{"):
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            return line
+        question = record.get(field) if isinstance(record, dict) else None
+        return question if isinstance(question, str) else None
+    for pattern in (FEEDBACK_LINE, UNANSWERED_LINE):
+        match = pattern.match(line)
+        if match:
+            return match["question"]
+    return line
+
+
+def read_batches(file_name, field, batch_size):
+    """
+    Streams (line number, question) pairs from the input file in fixed-size batches.
+    """
+    batch = []
+    with open(file_name, "r", encoding="utf-8") as question_file:
+        for line_number, line in enumerate(question_file, start=1):
+            line = line.rstrip("\r\n")
+            question = read_question(line, field) if line.strip() else None
+            if question is None:
+                continue
+            batch.append((line_number, question))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def init_worker(faq_file_name, snapshot_file_name, normalizer):
+    global _faq_index
+    _faq_index = load_faq_index(faq_file_name, snapshot_file_name, normalizer)
+
+
+def faq_key(faq_entry):
+    """
+    Returns a short hash of an FAQ's answer, used to recognise the FAQ between runs.
+
+    Unlike its position in faqs.json, the key stays the same when other FAQs are
+    added, removed or reordered, or when the FAQ's keywords are edited. It only
+    changes when the answer the user would see changes.
+    """
+    return hashlib.sha256(faq_entry["answer"].encode("utf-8")).hexdigest()[:12]
+
+
+def decide(top_contenders):
+    if len(top_contenders) == 1:
+        return ANSWER
+    if len(top_contenders) > 1:
+        return CLARIFY
+    return FALLBACK
+
+
+def evaluate_batch(batch):
+    """
+    Runs one batch of questions through the matcher in a worker process.
+
+    Unlike get_bot_response this writes nothing to the logs, so replays do not
+    pollute unanswered_questions.jsonl.
+
+    Returns:
+        list: One decision record per question. Matched FAQs are listed by faq_key(),
+              which is what runs are compared on, and by position in the FAQ file.
+    """
+    records = []
+    for line_number, question in batch:
+        top_contenders = _faq_index.top_contenders(preprocess_question(question, _faq_index.normalizer))
+        records.append({
+            "line": line_number,
+            "question": question,
+            "decision": decide(top_contenders),
+            "faq_keys": [faq_key(match_info["faq_entry"]) for match_info in top_contenders],
+            "faq_ids": [match_info["faq_id"] for match_info in top_contenders],
+            "scores": [match_info["score"] for match_info in top_contenders],
+        })
+    return records
+
+
+def evaluate(file_name, faq_file_name, field=None, workers=None, batch_size=BATCH_SIZE, snapshot_file_name=None,
+             normalizer=None):
+    """
+    Yields decision records for every question in the file, in input order.
+
+    Batches are spread over a process pool, with at most two batches per worker
+    in flight at a time, so memory stays constant however long the file is.
+
+    Args:
+        file_name (str): The question file.
+        faq_file_name (str): The FAQ JSON file to evaluate against.
+        field (str): Key holding the question in JSON records.
+        workers (int): Worker processes; defaults to the number of CPUs.
+        batch_size (int): Questions sent to a worker at a time.
+        snapshot_file_name (str): Compiled FAQ snapshot each worker tries before the FAQ file.
+        normalizer (Normalizer): Normalization for keywords and questions; defaults to
+                                 normalizer.default_normalizer.
+    """
+    workers = workers or os.cpu_count() or 1
+    in_flight = deque()
+    batches = read_batches(file_name, field or "question", batch_size)
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(faq_file_name, snapshot_file_name, normalizer)) as pool:
+        for batch in batches:
+            in_flight.append(pool.submit(evaluate_batch, batch))
+            if len(in_flight) >= workers * 2:
+                yield from in_flight.popleft().result()
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+
+def read_previous(file_name):
+    with open(file_name, "r", encoding="utf-8") as previous_file:
+        for line in previous_file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a file of questions through the matcher.")
+    parser.add_argument("questions", help="Question file: JSON Lines, old .log format or plain text.")
+    parser.add_argument("--faqs", default="faqs.json", help="Path to the FAQ JSON file.")
+    parser.add_argument("--snapshot", help="Compiled FAQ snapshot to load first (default: next to --faqs).")
+    parser.add_argument("--field", default="question", help="Key holding the question in JSON records.")
+    parser.add_argument("--output", default="-", help="Where to write decisions as JSON Lines (default: stdout).")
+    parser.add_argument("--previous", help="Decisions from an earlier run to compare against.")
+    parser.add_argument("--diff", help="Where to write the questions whose decision changed.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count).")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--fold-unicode", action="store_true",
+                        help="Fold accents and compatibility characters when normalizing; use the same setting as compile_faqs.py.")
+    args = parser.parse_args()
+
+    snapshot_file_name = args.snapshot or default_snapshot_path(args.faqs)
+    normalizer = Normalizer(fold_unicode=args.fold_unicode)
+    try:
+        load_faq_index(args.faqs, snapshot_file_name, normalizer)
+    except (OSError, ValueError) as error:
+        print(f"ERROR: Could not load {args.faqs}: {error}", file=sys.stderr)
+        sys.exit(1)
+
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    diff_output = open(args.diff, "w", encoding="utf-8") if args.diff else None
+    previous_records = read_previous(args.previous) if args.previous else None
+
+    decisions = Counter()
+    transitions = Counter()
+    changed = 0
+    start = time.perf_counter()
+    try:
+        for record in evaluate(args.questions, args.faqs, args.field, args.workers, args.batch_size,
+                               snapshot_file_name, normalizer):
+            decisions[record["decision"]] += 1
+            output.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+            if previous_records is not None:
+                previous = next(previous_records, None)
+                if previous is None or previous["line"] != record["line"]:
+                    print("ERROR: --previous was produced from a different question file.", file=sys.stderr)
+                    sys.exit(1)
+                if "faq_keys" not in previous:
+                    print("ERROR: --previous was produced by an older replay.py; replay it again first.",
+                          file=sys.stderr)
+                    sys.exit(1)
+                if (previous["decision"], previous["faq_keys"]) != (record["decision"], record["faq_keys"]):
+                    changed += 1
+                    transitions[f"{previous['decision']} -> {record['decision']}"] += 1
+                    if diff_output:
+                        diff_output.write(json.dumps({"before": previous, "after": record}, ensure_ascii=False) + "\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if diff_output:
+            diff_output.close()
+    elapsed = time.perf_counter() - start
+
+    total = sum(decisions.values())
+    print(f"Evaluated {total} questions in {elapsed:.2f}s ({total / elapsed if elapsed else 0:.0f} questions/s)",
+          file=sys.stderr)
+    for decision in (ANSWER, CLARIFY, FALLBACK):
+        print(f"  {decision}: {decisions[decision]}", file=sys.stderr)
+    if previous_records is not None:
+        print(f"Changed since previous run: {changed}", file=sys.stderr)
+        for transition, count in transitions.most_common():
+            print(f"  {transition}: {count}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# response_cache.py
+
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_MAX_SIZE = 4096
+CACHE_TTL = 15 * 60
+
+
+class ResponseCache:
+    """
+    Bounded LRU cache of matching results, keyed on the FAQ data version and the
+    processed question.
+
+    Every entry belongs to one version of the FAQ data (FaqIndex.version), and a
+    lookup only sees entries of the version it asks for, so answers from an old
+    knowledge base are never served. During a hot reload, questions still being
+    matched against the old index and questions on the new one can share the
+    cache; entries of a version nobody asks for any more simply age out of the
+    LRU. Entries also expire after `ttl` seconds. Every operation holds a lock, so
+    the cache can be shared between threads.
+
+    Attributes:
+        max_size (int): Maximum number of entries kept.
+        ttl (float): Seconds an entry stays valid; None disables expiry.
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups that had to run the matcher.
+        evictions (int): Entries dropped to stay within max_size.
+        expirations (int): Entries dropped because they outlived ttl.
+    """
+
+    def __init__(self, max_size=CACHE_MAX_SIZE, ttl=CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, version, key):
+        """
+        Looks up a cached value.
+
+        Args:
+            version (str): Version of the FAQ data the caller is matching against.
+            key (str): The processed question.
+
+        Returns:
+            The cached value, or None on a miss.
+        """
+        key = (version, key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+    def put(self, version, key, value):
+        """
+        Stores a value, evicting the least recently used entries if the cache is full.
+
+        Args:
+            version (str): Version of the FAQ data the value was computed from.
+            key (str): The processed question.
+            value: The matching result to cache.
+        """
+        key = (version, key)
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Returns the cache counters.
+
+        Returns:
+            dict: size, max_size, hits, misses, evictions, expirations and hit_rate.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
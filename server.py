@@ -0,0 +1,381 @@
+# server.py
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from chatbox import (
+    ChatSession,
+    FALLBACK,
+    GOODBYE_MESSAGE,
+    HUMAN_HELP_MESSAGE,
+    preprocess_question,
+    response_cache,
+    response_kind,
+)
+from faq_snapshot import default_snapshot_path, read_snapshot
+from faq_store import FaqStore, POLL_INTERVAL
+from metrics import metrics
+from normalizer import Normalizer
+
+SESSION_IDLE_TIMEOUT = 30 * 60
+SESSION_SWEEP_INTERVAL = 60
+MAX_BODY_SIZE = 64 * 1024
+
+HTTP_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+logger = logging.getLogger("chatbox.server")
+
+
+_faq_index = None
+_published_file_name = None
+_normalizer = None
+
+
+def init_worker(published_file_name, normalizer):
+    """
+    Maps the FAQ index the server published, before the worker takes any question.
+    """
+    global _faq_index, _published_file_name, _normalizer
+    _published_file_name, _normalizer = published_file_name, normalizer
+    _faq_index = read_snapshot(published_file_name, normalizer=normalizer)
+
+
+def worker_version():
+    return _faq_index.version
+
+
+def match_in_worker(version, user_question_processed):
+    """
+    Finds the top contenders for a question in a worker process.
+
+    Workers never read faqs.json. Each one maps the snapshot the server's FaqStore
+    publishes for every index it accepts, and maps it again when the server asks
+    for a version it does not have yet, e.g. after a hot reload.
+
+    Args:
+        version (str): FAQ data version the server is matching against.
+        user_question_processed (str): The user's question after preprocessing.
+
+    Returns:
+        tuple: (version the match was made against, top contenders, stage totals
+               recorded while matching).
+    """
+    global _faq_index
+    if _faq_index.version != version:
+        # The store publishes a new index before swapping it in, so the file is at least as new.
+        _faq_index = read_snapshot(_published_file_name, normalizer=_normalizer)
+    # A worker runs one task at a time, so its metrics hold exactly this match.
+    metrics.reset()
+    top_contenders = _faq_index.top_contenders(user_question_processed)
+    return _faq_index.version, top_contenders, metrics.stage_totals()
+
+
+class BadRequest(Exception):
+    """Raised when a request cannot be served; carries the HTTP status to answer with."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ChatServer:
+    """
+    Asyncio HTTP front end for the chatbot.
+
+    The FAQ index is loaded once and shared by every connection, and the
+    FaqStore swaps in a new snapshot when the FAQ file changes. Matching is
+    CPU-bound and holds the GIL, so it runs on a pool of worker processes that
+    each map the index the FaqStore published, and a slow question never blocks
+    the event loop. Each
+    user gets a ChatSession holding their pending feedback and clarification
+    state between requests; sessions and the response cache stay in the server
+    process.
+
+    Endpoints:
+        POST /ask       {"question": str, "session_id": str (optional)}
+        POST /feedback  {"session_id": str, "feedback": "y" | "n"}
+        GET  /metrics   stage timings, outcome counters, latency histogram and cache counters
+    """
+
+    def __init__(self, faq_store, workers=None):
+        """
+        Args:
+            faq_store (FaqStore): Holds the live FAQ index shared by all sessions. It must be
+                                  loaded and have a publish_file_name for the workers to map.
+            workers (int): Number of matching worker processes; defaults to the number of CPUs.
+        """
+        self.faq_store = faq_store
+        self.workers = workers or os.cpu_count() or 1
+        # Workers are spawned, not forked: forking while the FAQ watcher and log writer
+        # threads may hold locks can deadlock the child.
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                            initializer=init_worker,
+                                            initargs=(faq_store.publish_file_name, faq_store.normalizer))
+        self.sessions = {}
+        self.session_locks = {}
+
+    async def start_workers(self):
+        """
+        Starts every worker process and waits until each has mapped the index,
+        so that no question pays for starting one.
+        """
+        loop = asyncio.get_running_loop()
+        # Submitted together, the tasks find no idle worker and each one spawns a new process.
+        await asyncio.gather(*(loop.run_in_executor(self.executor, worker_version) for _ in range(self.workers)))
+
+    def get_session(self, session_id):
+        """
+        Returns the session with this id, creating it if it does not exist yet.
+        """
+        session = self.sessions.get(session_id) if session_id else None
+        if session is None:
+            session = ChatSession(session_id)
+            self.sessions[session.session_id] = session
+            self.session_locks[session.session_id] = asyncio.Lock()
+        return session
+
+    def end_session(self, session_id):
+        self.sessions.pop(session_id, None)
+        self.session_locks.pop(session_id, None)
+
+    async def expire_sessions(self):
+        """
+        Periodically drops sessions that have been idle for SESSION_IDLE_TIMEOUT seconds.
+        """
+        while True:
+            await asyncio.sleep(SESSION_SWEEP_INTERVAL)
+            cutoff = time.monotonic() - SESSION_IDLE_TIMEOUT
+            for session_id, session in list(self.sessions.items()):
+                if session.last_seen < cutoff and not self.session_locks[session_id].locked():
+                    self.end_session(session_id)
+
+    async def handle_ask(self, payload):
+        question = payload.get("question")
+        session_id = payload.get("session_id")
+        if not isinstance(question, str):
+            raise BadRequest(400, "'question' must be a string")
+        if session_id is not None and not isinstance(session_id, str):
+            raise BadRequest(400, "'session_id' must be a string")
+        session = self.get_session(session_id)
+
+        if preprocess_question(question) == 'bye':
+            self.end_session(session.session_id)
+            return {"session_id": session.session_id, "response": GOODBYE_MESSAGE, "kind": "goodbye",
+                    "awaiting_feedback": False, "human_help": None}
+
+        # One request at a time per session, so its pending state stays consistent.
+        async with self.session_locks[session.session_id]:
+            started = time.perf_counter()
+            faq_index = self.faq_store.index
+            processed_input, top_contenders = session.prepare_question(question, faq_index)
+            if not top_contenders:
+                top_contenders = await self.match(processed_input, faq_index)
+            response = session.complete_question(question, processed_input, top_contenders, started)
+
+        kind = response_kind(response)
+        return {
+            "session_id": session.session_id,
+            "response": response,
+            "kind": kind,
+            "awaiting_feedback": session.awaiting_feedback,
+            "human_help": HUMAN_HELP_MESSAGE if kind == FALLBACK else None,
+        }
+
+    async def match(self, user_question_processed, faq_index):
+        """
+        Finds the top contenders for a question on the worker pool, going through the response cache.
+        """
+        top_contenders = response_cache.get(faq_index.version, user_question_processed)
+        if top_contenders is None:
+            loop = asyncio.get_running_loop()
+            version, top_contenders, stage_totals = await loop.run_in_executor(
+                self.executor, match_in_worker, faq_index.version, user_question_processed)
+            metrics.merge_stages(stage_totals)
+            response_cache.put(version, user_question_processed, top_contenders)
+        return top_contenders
+
+    async def handle_feedback(self, payload):
+        session_id = payload.get("session_id")
+        feedback = payload.get("feedback")
+        if not isinstance(session_id, str):
+            raise BadRequest(400, "'session_id' must be a string")
+        if session_id not in self.sessions:
+            raise BadRequest(404, "Unknown session")
+        if not isinstance(feedback, str):
+            raise BadRequest(400, "'feedback' must be a string")
+
+        session = self.sessions[session_id]
+        async with self.session_locks[session_id]:
+            # Feedback is only queued for the background log writer, so it runs on the loop.
+            logged = session.give_feedback(feedback.strip().lower())
+        return {"session_id": session_id, "logged": logged}
+
+    def server_metrics(self):
+        """
+        Returns the metrics sections owned by the server rather than the metrics module.
+        """
+        return {"response_cache": response_cache.stats(), "active_sessions": len(self.sessions)}
+
+    async def dispatch(self, method, path, body):
+        if path == "/metrics":
+            if method != "GET":
+                raise BadRequest(405, "Use GET")
+            return {**metrics.snapshot(), **self.server_metrics()}
+        routes = {"/ask": self.handle_ask, "/feedback": self.handle_feedback}
+        if path not in routes:
+            raise BadRequest(404, "Not found")
+        if method != "POST":
+            raise BadRequest(405, "Use POST")
+        try:
+            payload = json.loads(body or b"{}")
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            raise BadRequest(400, "Body must be JSON")
+        if not isinstance(payload, dict):
+            raise BadRequest(400, "Body must be a JSON object")
+        return await routes[path](payload)
+
+    async def handle_connection(self, reader, writer):
+        """
+        Serves HTTP/1.1 requests on one connection until the client closes it.
+        """
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, path, version = request_line.split(" ", 2)
+                except ValueError:
+                    break
+                headers = {}
+                for line in header_lines:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+
+                body = None
+                try:
+                    try:
+                        content_length = int(headers.get("content-length", 0))
+                    except ValueError:
+                        raise BadRequest(400, "Invalid Content-Length")
+                    if not 0 <= content_length <= MAX_BODY_SIZE:
+                        raise BadRequest(413, "Body too large")
+                    body = await reader.readexactly(content_length)
+                    status, result = 200, await self.dispatch(method, path.split("?", 1)[0], body)
+                except BadRequest as error:
+                    status, result = error.status, {"error": str(error)}
+                    # An unread body would be taken for the next request.
+                    keep_alive = keep_alive and body is not None
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    raise
+                except Exception:
+                    logger.exception("Error handling %s %s", method, path)
+                    status, result = 500, {"error": "Internal server error"}
+                    keep_alive = False
+
+                payload = json.dumps(result).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + payload
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host, port, metrics_file=None):
+        await self.start_workers()
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        sweeper = asyncio.create_task(self.expire_sessions())
+        bound_port = server.sockets[0].getsockname()[1]
+        print(f"Serving Amaze Africa Fabrics chatbot on http://{host}:{bound_port}", flush=True)
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signal_number, stop.set)
+            except (NotImplementedError, RuntimeError):
+                # Not available on Windows; Ctrl+C still stops the server via KeyboardInterrupt.
+                pass
+        try:
+            async with server:
+                await stop.wait()
+        finally:
+            sweeper.cancel()
+            self.executor.shutdown(wait=True)
+            if metrics_file:
+                metrics.dump(metrics_file, **self.server_metrics())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the Amaze Africa Fabrics chatbot over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--faqs", default="faqs.json", help="Path to the FAQ JSON file.")
+    parser.add_argument("--snapshot", help="Compiled FAQ snapshot to load first (default: next to --faqs).")
+    parser.add_argument("--workers", type=int, default=None, help="Matching worker processes (default: CPU count).")
+    parser.add_argument("--fold-unicode", action="store_true",
+                        help="Fold accents and compatibility characters when normalizing; use the same setting as compile_faqs.py.")
+    parser.add_argument("--log-level", default="WARNING", help="DEBUG, INFO, WARNING or ERROR.")
+    parser.add_argument("--metrics-file", help="Write metrics to this JSON file on shutdown.")
+    parser.add_argument("--reload-interval", type=float, default=POLL_INTERVAL,
+                        help="Seconds between checks of the FAQ file for changes.")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(levelname)s: %(message)s")
+
+    with tempfile.TemporaryDirectory(prefix="chatbox-") as publish_dir:
+        faq_store = FaqStore(args.faqs, args.reload_interval, args.snapshot or default_snapshot_path(args.faqs),
+                             Normalizer(fold_unicode=args.fold_unicode),
+                             publish_file_name=os.path.join(publish_dir, "live.snapshot"))
+        try:
+            faq_store.load()
+        except FileNotFoundError:
+            print(f"ERROR: {args.faqs} not found!")
+            return
+        except json.JSONDecodeError:
+            print(f"ERROR: Could not decode {args.faqs}. Check for syntax errors in your JSON file.")
+            return
+        except ValueError as error:
+            print(f"ERROR: {args.faqs} is not valid FAQ data: {error}")
+            return
+        except OSError as error:
+            print(f"ERROR: Could not load {args.faqs}: {error}")
+            return
+        faq_store.start()
+
+        try:
+            asyncio.run(ChatServer(faq_store, args.workers).serve(args.host, args.port, args.metrics_file))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            faq_store.stop()
+
+
+if __name__ == "__main__":
+    main()